@@ -0,0 +1,82 @@
+"""
+Synthetic homework.json files for the benchmarks.
+
+    python benchmarks/homework/generate.py 10000 --out data/homework.json
+
+Field distributions follow a student's planner rather than uniform noise:
+a handful of subjects dominate, deadlines cluster in the coming weeks with
+a tail of overdue and far-off work, most open tasks are Medium priority,
+and notes and time estimates are only filled in on some tasks.
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+SUBJECTS = (("Math", 24), ("Physics", 12), ("Chemistry", 10), ("Biology", 10), ("English", 14),
+            ("History", 9), ("Computer Science", 11), ("Economics", 5), ("Art", 3), ("Music", 2))
+CATEGORIES = (("", 30), ("Math", 15), ("Science", 20), ("English", 12), ("History", 8),
+              ("Computer", 10), ("Other", 5))
+PRIORITIES = (("Medium", 50), ("High", 28), ("Low", 22))
+KINDS = ("Essay", "Problem Set", "Lab Report", "Reading", "Quiz Prep", "Project", "Worksheet",
+         "Presentation", "Revision", "Exercises")
+TOPICS = ("chapter 3", "chapter 7", "midterm", "final", "week 5", "unit 2", "group", "draft",
+          "outline", "review", "part A", "part B", "extra credit", "practice")
+NOTES = ("", "", "", "bring calculator", "submit online", "check rubric", "ask teacher about Q4",
+         "read pages 40-62", "email group", "print before class", "use APA style")
+
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return values, weights
+
+
+def generate_tasks(count, seed=0, today=None):
+    """Yield `count` task dicts; the same seed gives the same tasks."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    subjects, subject_w = _weighted(SUBJECTS)
+    categories, category_w = _weighted(CATEGORIES)
+    priorities, priority_w = _weighted(PRIORITIES)
+    for i in range(count):
+        # most deadlines are a few weeks out; some are overdue, a few are months away
+        offset = int(rng.gauss(10, 20)) if rng.random() < 0.9 else rng.randint(60, 240)
+        deadline = today + timedelta(days=offset)
+        # past work is mostly done, upcoming work mostly not
+        done = rng.random() < (0.85 if offset < 0 else 0.25)
+        task = {
+            "id": f"bench-{seed}-{i}",
+            "subject": rng.choices(subjects, subject_w)[0],
+            "title": f"{rng.choice(KINDS)} {rng.choice(TOPICS)}",
+            "deadline": deadline.isoformat(),
+            "category": rng.choices(categories, category_w)[0],
+            "priority": rng.choices(priorities, priority_w)[0],
+            "status": "Done" if done else "Not Done",
+            "notes": rng.choice(NOTES),
+        }
+        if rng.random() < 0.3:
+            task["estimate_hours"] = rng.choice((0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0))
+        yield task
+
+
+def write_homework_json(path, count, seed=0):
+    """Write a homework.json with `count` tasks (streamed, one task at a time)."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, task in enumerate(generate_tasks(count, seed)):
+            f.write(",\n" if i else "\n")
+            json.dump(task, f, ensure_ascii=False)
+        f.write("\n]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic homework.json")
+    parser.add_argument("count", type=int, help="number of tasks")
+    parser.add_argument("--out", default="homework.json", help="output file (default: homework.json)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_homework_json(args.out, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Homework Planner benchmarks.
+
+    python benchmarks/homework/run.py                          # 1k, 10k, 100k and 500k tasks
+    python benchmarks/homework/run.py --sizes 1000 10000 --output before.json
+    python benchmarks/homework/run.py --compare before.json    # flag regressions against a saved run
+
+For each size a fresh data directory gets a generated homework.json, then
+load_tasks, save_tasks, planner start-up, refresh_table, _apply_search and
+CalendarView._draw_month are timed. Tk is replaced by tkstub, so no display
+is needed and widget calls cost almost nothing (the numbers are the
+planner's own work); --real-tk uses tkinter instead (e.g. under Xvfb).
+Results are written as JSON: median and best time in ms per operation.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parents[1]
+DEFAULT_SIZES = (1000, 10000, 100000, 500000)
+SEARCHES = {
+    "free_text": "essay",
+    "free_text_prefix": "rev",
+    "facet": "subject:math",
+    "facets_and_text": 'subject:math status:"not done" draft',
+    "due_range": "due:>=today due:<=sunday",
+    "overdue": "overdue",
+}
+REGRESSION_RATIO = 1.2   # --compare flags operations this much slower
+
+
+def timed(func, repeat):
+    """Run func `repeat` times; returns {"median_ms", "min_ms", "runs"}."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3),
+            "runs": repeat}
+
+
+def bench_size(hp, tk, pump, count, repeat):
+    from generate import write_homework_json
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="homework-bench-") as tmp:
+        os.chdir(tmp)
+        try:
+            hp.ensure_data_dir()
+            write_homework_json(hp.DATA_FILE, count)
+
+            def fresh_load():
+                hp._storage = None
+                return hp.load_tasks()
+
+            results["load_tasks"] = timed(fresh_load, repeat)
+            tasks = fresh_load()
+            results["save_tasks"] = timed(lambda: hp.save_tasks(tasks), repeat)
+            del tasks
+            hp._storage = None
+
+            root = tk.Tk()
+            start = time.perf_counter()
+            planner = hp.HomeworkPlanner(root)
+            results["startup_first_screen"] = {"ms": round((time.perf_counter() - start) * 1000, 3)}
+            pump(root, lambda: planner.store._loader is None)
+            results["startup_full_load"] = {"ms": round((time.perf_counter() - start) * 1000, 3)}
+
+            results["refresh_table"] = timed(planner.refresh_table, repeat)
+
+            def search(query):
+                planner.search_var.set(query)
+                planner._last_search = None   # no narrowing from the previous query
+                planner._apply_search()
+
+            for name, query in SEARCHES.items():
+                results[f"apply_search.{name}"] = timed(lambda q=query: search(q), repeat)
+                results[f"apply_search.{name}"]["rows"] = len(planner.filtered_tasks)
+            search("")
+
+            view = hp.CalendarView(root, planner.store, planner.theme, planner.schedule)
+
+            def draw_cold():
+                view._bucket_cache.clear()
+                view._draw_month()
+
+            results["draw_month.cold"] = timed(draw_cold, repeat)
+            results["draw_month.warm"] = timed(view._draw_month, repeat)
+
+            planner.store.close()
+            root.destroy()
+        finally:
+            os.chdir(REPO)
+            hp._storage = None
+            gc.collect()
+    return results
+
+
+def compare(old, new):
+    """Print old vs new medians; returns the number of regressions."""
+    regressions = 0
+    for size, ops in new["results"].items():
+        for op, stats in ops.items():
+            before = old.get("results", {}).get(size, {}).get(op)
+            if not before:
+                continue
+            key = "median_ms" if "median_ms" in stats else "ms"
+            if not before.get(key):
+                continue
+            ratio = stats[key] / before[key]
+            flag = "  SLOWER" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"{size:>8} {op:<32} {before[key]:>10.2f} -> {stats[key]:>10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Homework Planner's hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="task counts")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timed operation")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--real-tk", action="store_true", help="use tkinter instead of tkstub")
+    parser.add_argument("--output", default="homework_bench.json", help="results file")
+    parser.add_argument("--compare", metavar="OLD", help="results file of an earlier run")
+    args = parser.parse_args()
+
+    os.environ["HOMEWORK_STORAGE"] = args.backend
+    sys.path[:0] = [str(HERE), str(REPO)]
+    if args.real_tk:
+        import tkinter as tk
+
+        def pump(root, until):
+            while not until():
+                root.update()
+    else:
+        import tkstub
+        tkstub.install()
+        tk = sys.modules["tkinter"]
+
+        def pump(root, until):
+            tkstub.run_pending(until)
+    import home_planner as hp
+
+    output = Path(args.output).resolve()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tk": "real" if args.real_tk else "stub",
+            "backend": args.backend,
+        },
+        "results": {},
+    }
+    for count in args.sizes:
+        print(f"{count} tasks...", flush=True)
+        report["results"][str(count)] = results = bench_size(hp, tk, pump, count, args.repeat)
+        for op, stats in results.items():
+            print(f"  {op:<32} {stats.get('median_ms', stats.get('ms')):>10.2f} ms")
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(old, report):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
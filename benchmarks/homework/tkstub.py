@@ -0,0 +1,216 @@
+"""
+A stand-in for tkinter so the Homework Planner can be built and timed
+without a display. Widgets keep their options and children, Treeview and
+Listbox keep their items, and after()/after_idle() callbacks go into a
+queue that the benchmark runs on a virtual clock (see run_pending).
+Every other widget method is accepted and does nothing.
+
+install() must run before home_planner is imported.
+"""
+import heapq
+import itertools
+import sys
+import types
+
+END = "end"
+_queue = []              # (due ms, seq, job id, func, args)
+_cancelled = set()
+_seq = itertools.count()
+_now = 0                 # virtual clock in ms
+
+
+def _noop(*args, **kwargs):
+    return ""
+
+
+class Misc:
+    def __init__(self, master=None, *args, **kw):
+        self.master = master
+        self._options = dict(kw)
+        self._children = []
+        self._bindings = {}
+        if isinstance(master, Misc):
+            master._children.append(self)
+
+    def __getattr__(self, name):
+        # title, geometry, pack, grid, focus_set, ...: accepted and ignored
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _noop
+
+    def configure(self, cnf=None, **kw):
+        self._options.update(cnf or {}, **kw)
+
+    config = configure
+
+    def cget(self, key):
+        return self._options.get(key, "")
+
+    __getitem__ = cget
+
+    def __setitem__(self, key, value):
+        self._options[key] = value
+
+    def bind(self, sequence=None, func=None, add=None):
+        self._bindings.setdefault(sequence, []).append(func)
+
+    def winfo_children(self):
+        return list(self._children)
+
+    def winfo_exists(self):
+        return 1
+
+    def destroy(self):
+        for child in list(self._children):
+            child.destroy()
+        for func in self._bindings.get("<Destroy>", ()):
+            func(types.SimpleNamespace(widget=self))
+        if isinstance(self.master, Misc) and self in self.master._children:
+            self.master._children.remove(self)
+
+    def after(self, ms, func=None, *args):
+        job = f"after#{next(_seq)}"
+        heapq.heappush(_queue, (_now + int(ms), next(_seq), job, func, args))
+        return job
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job):
+        _cancelled.add(job)
+
+
+class Tk(Misc):
+    def __init__(self, *args, **kw):
+        super().__init__(None)
+
+    def mainloop(self):
+        pass
+
+
+class Variable:
+    def __init__(self, master=None, value="", name=None):
+        self._value = value
+        self._traces = []
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        for callback in self._traces:
+            callback("", "", "write")
+
+    def trace_add(self, mode, callback):
+        self._traces.append(callback)
+
+
+class StringVar(Variable):
+    pass
+
+
+class Treeview(Misc):
+    def __init__(self, master=None, **kw):
+        super().__init__(master, **kw)
+        self._items = {}
+        self._ids = itertools.count()
+
+    def insert(self, parent, index, iid=None, **kw):
+        iid = iid or f"I{next(self._ids)}"
+        self._items[iid] = kw
+        return iid
+
+    def item(self, iid, option=None, **kw):
+        if kw:
+            self._items[iid].update(kw)
+        return self._items[iid]
+
+    def delete(self, *iids):
+        for iid in iids:
+            self._items.pop(iid, None)
+
+    def get_children(self, item=""):
+        return tuple(self._items)
+
+
+class Listbox(Misc):
+    def __init__(self, master=None, **kw):
+        super().__init__(master, **kw)
+        self._items = []
+
+    def insert(self, index, *elements):
+        pos = len(self._items) if index == END else int(index)
+        self._items[pos:pos] = elements
+
+    def delete(self, first, last=None):
+        if last == END:
+            del self._items[int(first):]
+        else:
+            del self._items[int(first):int(first if last is None else last) + 1]
+
+    def size(self):
+        return len(self._items)
+
+
+class Style:
+    def __init__(self, master=None):
+        pass
+
+    def __getattr__(self, name):
+        return _noop
+
+
+def _widget(name):
+    return type(name, (Misc,), {})
+
+
+def run_pending(until=None, limit_ms=60_000):
+    """
+    Run queued after() callbacks in due order on the virtual clock, until
+    `until()` is true or nothing is due within `limit_ms` of virtual time.
+    """
+    global _now
+    deadline = _now + limit_ms
+    while _queue and not (until and until()):
+        due, _, job, func, args = _queue[0]
+        if due > deadline:
+            break
+        heapq.heappop(_queue)
+        _now = max(_now, due)
+        if job in _cancelled:
+            _cancelled.discard(job)
+            continue
+        func(*args)
+
+
+def install():
+    """Register the stub as tkinter (and its ttk / dialog submodules) in sys.modules."""
+    tk = types.ModuleType("tkinter")
+    tk.END = END
+    tk.TclError = RuntimeError
+    tk.Misc = tk.Widget = Misc
+    tk.Tk, tk.Variable, tk.StringVar = Tk, Variable, StringVar
+    tk.IntVar = tk.BooleanVar = tk.DoubleVar = Variable
+    tk.Listbox = Listbox
+    for name in ("Toplevel", "Frame", "Label", "Button", "Entry", "Spinbox", "Menu", "Menubutton",
+                 "Canvas", "Scrollbar", "Text", "Checkbutton", "Radiobutton", "Scale"):
+        setattr(tk, name, _widget(name))
+
+    ttk = types.ModuleType("tkinter.ttk")
+    ttk.Treeview, ttk.Style = Treeview, Style
+    for name in ("Frame", "Label", "Button", "Entry", "Combobox", "Spinbox", "Scrollbar",
+                 "Progressbar", "Notebook", "Checkbutton"):
+        setattr(ttk, name, _widget(name))
+
+    dialogs = {}
+    for name in ("messagebox", "simpledialog", "filedialog"):
+        module = types.ModuleType(f"tkinter.{name}")
+        module.__getattr__ = lambda attr: _noop
+        dialogs[name] = module
+        setattr(tk, name, module)
+    tk.ttk = ttk
+
+    sys.modules["tkinter"] = tk
+    sys.modules["tkinter.ttk"] = ttk
+    for name, module in dialogs.items():
+        sys.modules[f"tkinter.{name}"] = module
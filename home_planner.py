@@ -9,16 +9,46 @@
 # - Monthly Calendar View window showing tasks per day
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime, date
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from datetime import datetime, date, timedelta, timezone
 import calendar
+import csv
+import argparse
+import atexit
+import bisect
 import json
+import os
+import queue
+import re
+import sys
+import sqlite3
+import threading
+import time
 import uuid
+from collections import deque
 from pathlib import Path
 
 # Configuration for data storage
 DATA_DIR = Path("data")
 DATA_FILE = DATA_DIR / "homework.json"
+JOURNAL_FILE = DATA_DIR / "homework.journal"
+JOURNAL_COMPACT_BYTES = 256 * 1024  # compact once the journal passes this size
+FIRST_SCREEN_ROWS = 200   # tasks shown before the rest of the file is parsed
+LOAD_BATCH_ROWS = 500     # tasks read from storage per step while loading the rest
+LOAD_TICK_MS = 30         # UI time spent loading per tick; the next batch waits for the next tick
+READ_CHUNK_CHARS = 1 << 16
+SAVE_DEBOUNCE_MS = 300   # changes within this window are written together
+SAVE_RETRY_SECONDS = 5   # wait before retrying a failed write
+WRITER_POLL_MS = 500     # how often the UI checks for save errors
+DB_FILE = DATA_DIR / "homework.db"
+FILTERS_FILE = DATA_DIR / "homework_filters.json"  # saved search filters: name -> query
+# "json" (homework.json + journal) or "sqlite" (homework.db, migrated from homework.json once)
+STORAGE_BACKEND = os.environ.get("HOMEWORK_STORAGE", "json")
+TASK_FIELDS = ("id", "subject", "title", "deadline", "category", "priority", "status", "notes")
+SEARCH_FIELDS = ("subject", "title", "notes", "category", "priority", "status")
+FACET_FIELDS = ("subject", "category", "priority", "status")  # indexed value -> ids
+PRIORITIES = ("Low", "Medium", "High")
+CATEGORIES = ("", "Math", "Science", "English", "History", "Computer", "Other")
 DATE_FORMAT = "%Y-%m-%d"
 
 # ---------- Data Storage Functions ----------
@@ -26,16 +56,9 @@ def ensure_data_dir():
     """Ensure data directory exists"""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def load_tasks():
-    ensure_data_dir()
-    if not DATA_FILE.exists():
-        return []
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            tasks = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        tasks = []
-    # Backward compatibility: ensure each task has an 'id' and default fields
+def _apply_task_defaults(tasks):
+    """Backward compatibility: ensure each task has an 'id' and default fields.
+    Returns True if any id had to be generated."""
     changed = False
     for t in tasks:
         if "id" not in t:
@@ -45,14 +68,1475 @@ def load_tasks():
         t.setdefault("priority", "Medium")
         t.setdefault("status", "Not Done")
         t.setdefault("notes", "")
-    if changed:
-        save_tasks(tasks)
-    return tasks
+    return changed
+
+def _backfill_id(position, task):
+    """Id for a snapshot task saved before ids existed. It is derived from the
+    task's position and content, so it comes out the same on every load until
+    the snapshot is rewritten with the ids in it."""
+    key = f"{position}:{json.dumps(task, sort_keys=True, ensure_ascii=False)}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "homework-task:" + key))
+
+def iter_json_array(path, chunk_chars=READ_CHUNK_CHARS):
+    """Yield the items of a top-level JSON array file one at a time, reading it in
+    chunks, so the first items are available without parsing the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, eof = "", False
+        while not buf and not eof:
+            more = f.read(chunk_chars)
+            eof = not more
+            buf = more.lstrip()
+        if not buf.startswith("["):
+            raise json.JSONDecodeError("expected a JSON array", buf, 0)
+        pos = 1
+        while True:
+            # skip whitespace and the separator before the next item
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("need more data", buf, pos)
+                item, end = decoder.raw_decode(buf, pos)
+                if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                    # a number cut by the chunk boundary ("1." of "1.5") still parses; read on
+                    raise json.JSONDecodeError("need more data", buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(chunk_chars)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield item
+            pos = end
+
+def _write_json_atomic(path, data):
+    """Write JSON to a temp file next to `path`, fsync it, then rename it over `path`."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class JournaledTaskStorage:
+    """
+    Snapshot + append-only journal storage for homework tasks.
+    - homework.json holds a periodic snapshot (same list format as before)
+    - homework.journal holds one JSON line per mutation since that snapshot:
+        {"op": "put", "task": {...}}   add or replace a task (by id)
+        {"op": "del", "id": "..."}     remove a task
+    - load() replays snapshot + journal; iter_load() does the same in batches
+      while parsing homework.json incrementally
+    - once the journal passes `compact_bytes`, a background thread writes a
+      fresh snapshot and drops the journal segment it covers
+    """
+    indexed = False  # status and deadline queries are answered by the in-memory TaskIndex
+
+    def __init__(self, data_file=None, journal_file=None, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.data_file = Path(data_file or DATA_FILE)
+        self.journal_file = Path(journal_file or JOURNAL_FILE)
+        # journal segment being folded into a snapshot by the compactor
+        self.rotated_file = self.journal_file.with_name(self.journal_file.name + ".old")
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+        self._compactor = None
+        self._backfilled = False  # ids were journaled for an old snapshot; compact once to store them
+
+    def _ensure_dir(self):
+        self.data_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # ---------- reading ----------
+    def _iter_snapshot(self):
+        """Parse homework.json item by item; a corrupt file ends the list where it breaks."""
+        if not self.data_file.exists():
+            return
+        try:
+            yield from iter_json_array(self.data_file)
+        except (json.JSONDecodeError, FileNotFoundError, UnicodeDecodeError) as e:
+            print(f"Error reading {self.data_file}: {e}")
+
+    def _replay(self, path, ops):
+        """Collect journal entries as id -> latest task, or None if it was deleted."""
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn trailing line from a crash mid-append; nothing after it is valid
+                    break
+                op = entry.get("op")
+                if op == "put":
+                    task = entry.get("task") or {}
+                    if "id" in task:
+                        ops[task["id"]] = task
+                elif op == "del":
+                    ops[entry.get("id")] = None
+
+    def iter_load(self, first_batch=FIRST_SCREEN_ROWS, batch_size=LOAD_BATCH_ROWS, write_ids=True):
+        """
+        Yield the current tasks in batches: `first_batch` tasks first, so a
+        screen of rows can be shown before the rest of the file is read.
+        The journal (kept small by compaction) is read up front and applied
+        to snapshot tasks as they stream past. With write_ids=False, ids
+        backfilled for an old snapshot are not journaled (nothing is written).
+        """
+        self._ensure_dir()
+        ops = {}
+        self._replay(self.rotated_file, ops)
+        self._replay(self.journal_file, ops)
+        journaled = set(ops)
+        backfilled = []
+        batch, limit = [], first_batch
+        for position, task in enumerate(self._iter_snapshot()):
+            if not isinstance(task, dict):
+                continue
+            if "id" not in task:
+                task["id"] = _backfill_id(position, task)
+                # the journal already has this id from an earlier load; its entries are newer
+                if write_ids and task["id"] not in journaled:
+                    backfilled.append(task)
+            # defaults are filled in as each task is parsed, not in a separate pass
+            _apply_task_defaults((task,))
+            if task["id"] in ops:
+                task = ops.pop(task["id"])
+                if task is None:
+                    continue
+                _apply_task_defaults((task,))
+            batch.append(task)
+            if len(batch) >= limit:
+                self._journal_backfill(backfilled)
+                yield batch
+                batch, limit = [], batch_size
+        for task in ops.values():
+            if task is not None:
+                _apply_task_defaults((task,))
+                batch.append(task)
+        self._journal_backfill(backfilled)
+        if batch:
+            yield batch
+
+    def _journal_backfill(self, backfilled):
+        """
+        Old files without ids: journal the ids before the batch is handed out,
+        so any edit made to those tasks afterwards lands after them in the
+        journal. The next maybe_compact() then writes a snapshot with the ids.
+        """
+        if backfilled:
+            self._append(*({"op": "put", "task": t} for t in backfilled))
+            backfilled.clear()
+            self._backfilled = True
+
+    def load(self, write_ids=True):
+        return [t for batch in self.iter_load(write_ids=write_ids) for t in batch]
+
+    # ---------- writing ----------
+    def _append(self, *entries):
+        self._ensure_dir()
+        data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries)
+        with self._lock:
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def put(self, task):
+        """Journal an added or edited task."""
+        self._append({"op": "put", "task": task})
+
+    def delete(self, tid):
+        """Journal a task removal."""
+        self._append({"op": "del", "id": tid})
+
+    def apply_batch(self, changes):
+        """Journal [(id, ("put", task) | ("del", None)), ...] with one write and one fsync."""
+        self._append(*({"op": "put", "task": task} if op == "put" else {"op": "del", "id": tid}
+                       for tid, (op, task) in changes))
+
+    def save(self, tasks):
+        """Write a full snapshot synchronously and clear the journal."""
+        self._ensure_dir()
+        self.wait_for_compaction()
+        with self._lock:
+            _write_json_atomic(self.data_file, tasks)
+            self._backfilled = False
+            for path in (self.rotated_file, self.journal_file):
+                if path.exists():
+                    path.unlink()
+
+    # ---------- compaction ----------
+    def journal_size(self):
+        try:
+            return self.journal_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def maybe_compact(self, tasks):
+        """Start a background compaction if the journal has grown past the threshold
+        (or ids were backfilled and the snapshot does not have them yet)."""
+        if self._backfilled or self.journal_size() >= self.compact_bytes:
+            self.compact(tasks)
+
+    def compact(self, tasks, background=True):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self._lock:
+            # Everything journaled so far moves to the rotated segment; new
+            # mutations go to a fresh journal that is replayed on top of the snapshot.
+            if self.journal_file.exists():
+                if self.rotated_file.exists():
+                    # left over from an interrupted compaction: keep both segments
+                    with open(self.rotated_file, "a", encoding="utf-8") as dst, \
+                            open(self.journal_file, "r", encoding="utf-8") as src:
+                        dst.write(src.read())
+                    self.journal_file.unlink()
+                else:
+                    os.replace(self.journal_file, self.rotated_file)
+            snapshot = [dict(t) for t in tasks]
+            self._backfilled = False
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=False)
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot)
+
+    def _write_snapshot(self, snapshot):
+        try:
+            _write_json_atomic(self.data_file, snapshot)
+            if self.rotated_file.exists():
+                self.rotated_file.unlink()
+        except OSError as e:
+            # the rotated journal is kept, so nothing is lost; the next compaction retries
+            print(f"Error compacting {self.data_file}: {e}")
+
+    def wait_for_compaction(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+class SQLiteTaskStorage:
+    """
+    SQLite storage for homework tasks (data/homework.db).
+    - same load/save/put/delete contract as JournaledTaskStorage
+    - indexes on deadline, status and subject; the status lists and the
+      calendar months are read with ids_with_status / ids_due_between, so
+      they are complete while the planner is still loading
+    - on first use, tasks are migrated once from homework.json (+ journal);
+      the JSON files are left untouched
+    - fields outside TASK_FIELDS are kept as JSON in the 'extra' column
+    """
+    indexed = True
+
+    def __init__(self, db_file=None, json_storage=None):
+        self.db_file = Path(db_file or DB_FILE)
+        self.json_storage = json_storage or JournaledTaskStorage()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                subject TEXT NOT NULL DEFAULT '',
+                title TEXT NOT NULL DEFAULT '',
+                deadline TEXT NOT NULL DEFAULT '',
+                category TEXT NOT NULL DEFAULT '',
+                priority TEXT NOT NULL DEFAULT 'Medium',
+                status TEXT NOT NULL DEFAULT 'Not Done',
+                notes TEXT NOT NULL DEFAULT '',
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks(deadline);
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, deadline);
+            CREATE INDEX IF NOT EXISTS idx_tasks_subject ON tasks(subject COLLATE NOCASE);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+        conn.commit()
+        self._conn = conn
+        self._migrate_from_json()
+        return conn
+
+    def _migrate_from_json(self):
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM meta WHERE key='migrated_from_json'").fetchone():
+            return
+        if self.json_storage.data_file.exists() or self.json_storage.journal_file.exists():
+            self._replace_all(self.json_storage.load(write_ids=False))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', datetime('now'))")
+        conn.commit()
+
+    @staticmethod
+    def _task_to_row(task):
+        extra = {k: v for k, v in task.items() if k not in TASK_FIELDS}
+        return (
+            task["id"], task.get("subject", ""), task.get("title", ""), task.get("deadline", ""),
+            task.get("category", ""), task.get("priority", "Medium"), task.get("status", "Not Done"),
+            task.get("notes", ""), json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+
+    @staticmethod
+    def _row_to_task(row):
+        task = {k: row[k] for k in TASK_FIELDS}
+        if row["extra"]:
+            task.update(json.loads(row["extra"]))
+        return task
+
+    def _fetch(self, after_rowid=0, limit=-1):
+        """Tasks with rowid > after_rowid in rowid order, and the last rowid read."""
+        conn = self._connect()
+        with self._lock:
+            rows = conn.execute("SELECT rowid, * FROM tasks WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                (after_rowid, limit)).fetchall()
+        return [self._row_to_task(r) for r in rows], (rows[-1]["rowid"] if rows else after_rowid)
+
+    def _ids(self, where, params=()):
+        conn = self._connect()
+        with self._lock:
+            return [r[0] for r in conn.execute(f"SELECT id FROM tasks WHERE {where}", params)]
+
+    def _replace_all(self, tasks):
+        conn = self._conn
+        with self._lock:
+            conn.execute("DELETE FROM tasks")
+            conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (self._task_to_row(t) for t in tasks))
+            conn.commit()
+
+    # ---------- storage contract ----------
+    def load(self):
+        tasks, _ = self._fetch()
+        if _apply_task_defaults(tasks):
+            self.save(tasks)
+        return tasks
+
+    def save(self, tasks):
+        self._connect()
+        self._replace_all(tasks)
+
+    def iter_load(self, first_batch=FIRST_SCREEN_ROWS, batch_size=LOAD_BATCH_ROWS):
+        """
+        Yield the tasks a page at a time (first page `first_batch` rows). Each
+        page starts after the last rowid read, so it is one index seek and
+        does not rescan the rows already loaded.
+        """
+        last, limit = 0, first_batch
+        while True:
+            batch, last = self._fetch(last, limit)
+            if not batch:
+                return
+            if _apply_task_defaults(batch):
+                self.apply_batch([(t["id"], ("put", t)) for t in batch])
+            yield batch
+            limit = batch_size
+
+    _UPSERT = '''INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                  ON CONFLICT(id) DO UPDATE SET
+                      subject=excluded.subject, title=excluded.title, deadline=excluded.deadline,
+                      category=excluded.category, priority=excluded.priority,
+                      status=excluded.status, notes=excluded.notes, extra=excluded.extra'''
+
+    def put(self, task):
+        conn = self._connect()
+        with self._lock:
+            conn.execute(self._UPSERT, self._task_to_row(task))
+            conn.commit()
+
+    def delete(self, tid):
+        conn = self._connect()
+        with self._lock:
+            conn.execute("DELETE FROM tasks WHERE id=?", (tid,))
+            conn.commit()
+
+    def apply_batch(self, changes):
+        """Apply [(id, ("put", task) | ("del", None)), ...] in one transaction."""
+        conn = self._connect()
+        puts = [self._task_to_row(task) for _, (op, task) in changes if op == "put"]
+        dels = [(tid,) for tid, (op, _) in changes if op == "del"]
+        with self._lock:
+            with conn:
+                conn.executemany(self._UPSERT, puts)
+                conn.executemany("DELETE FROM tasks WHERE id=?", dels)
+
+    def maybe_compact(self, tasks):
+        pass  # SQLite updates rows in place
+
+    def wait_for_compaction(self):
+        pass
+
+    # ---------- indexed queries ----------
+    def ids_with_status(self, status):
+        """Ids of the tasks with one status, in the order they were added."""
+        return self._ids("status=? ORDER BY rowid", (status,))
+
+    def ids_due_between(self, start, end):
+        """Ids of the tasks whose deadline is in [start, end] (YYYY-MM-DD strings), by deadline."""
+        return self._ids("deadline BETWEEN ? AND ? ORDER BY deadline, rowid", (start, end))
+
+    def tasks_by_id(self, ids):
+        """The stored tasks with these ids, as {id: task}."""
+        conn = self._connect()
+        ids = list(ids)
+        tasks = {}
+        for i in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i:i + 500]
+            with self._lock:
+                rows = conn.execute(f"SELECT * FROM tasks WHERE id IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+            tasks.update((r["id"], self._row_to_task(r)) for r in rows)
+        return tasks
+
+class BackgroundWriter:
+    """
+    Write-behind persistence for the planner.
+    - put()/delete() only record the change and return immediately
+    - a worker thread waits SAVE_DEBOUNCE_MS after the first change, keeps
+      the latest change per task id, and hands the batch to
+      storage.apply_batch() (one journal write / one SQLite transaction)
+    - a failed batch is kept for a retry; the error is queued for the Tk
+      thread to pick up with take_error()
+    - close() flushes whatever is pending (registered with atexit until it runs)
+    """
+    def __init__(self, storage, delay_ms=None):
+        self.storage = storage
+        self.delay = (SAVE_DEBOUNCE_MS if delay_ms is None else delay_ms) / 1000
+        self._pending = {}  # id -> ("put", task copy) | ("del", None)
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._errors = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="homework-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, task):
+        self.apply([(task["id"], ("put", task))])
+
+    def delete(self, tid):
+        self.apply([(tid, ("del", None))])
+
+    def apply(self, changes):
+        """Queue [(id, ("put", task) | ("del", None)), ...] together."""
+        with self._cond:
+            for tid, (op, task) in changes:
+                # copy, so the worker never serializes a dict the UI is changing
+                self._pending[tid] = (op, dict(task) if task is not None else None)
+            self._cond.notify()
+
+    def take_error(self):
+        try:
+            return self._errors.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return  # close() flushes the rest on its own thread
+                # coalesce everything that arrives within the window
+                deadline = time.monotonic() + self.delay
+                while not self._stopped and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+            if not self.flush():
+                with self._cond:
+                    self._cond.wait(SAVE_RETRY_SECONDS)
+
+    def flush(self):
+        """Write all pending changes now; returns False if the write failed."""
+        with self._io_lock:
+            with self._cond:
+                batch = list(self._pending.items())
+                self._pending.clear()
+            if not batch:
+                return True
+            try:
+                self.storage.apply_batch(batch)
+            except (OSError, sqlite3.Error) as e:
+                with self._cond:
+                    for tid, change in batch:
+                        # newer changes made in the meantime win
+                        self._pending.setdefault(tid, change)
+                self._errors.put(e)
+                return False
+            return True
+
+    def close(self):
+        atexit.unregister(self.close)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+        self.storage.wait_for_compaction()
+
+_storage = None
+
+def get_storage():
+    """Return the shared task storage backend selected by STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        _storage = SQLiteTaskStorage() if STORAGE_BACKEND == "sqlite" else JournaledTaskStorage()
+    return _storage
+
+def load_tasks():
+    return get_storage().load()
 
 def save_tasks(tasks):
+    get_storage().save(tasks)
+
+def load_saved_filters():
+    """Saved search filters as {name: query text}."""
+    try:
+        with open(FILTERS_FILE, "r", encoding="utf-8") as f:
+            filters = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return filters if isinstance(filters, dict) else {}
+
+def save_saved_filters(filters):
     ensure_data_dir()
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=4)
+    _write_json_atomic(FILTERS_FILE, filters)
+
+# ---------- In-memory task index ----------
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+SEARCH_DEBOUNCE_MS = 120
+ROW_PATCH_LIMIT = 64     # larger changes re-sort the table once instead of patching rows
+QUICK_FILTERS = (
+    ("Due This Week", "due:>=today due:<=sunday"),
+    ("Overdue", "overdue"),
+    ("Next 30 Days", "due:>=today due:<=+30"),
+)
+WORKLOAD_DAYS = 14
+FACET_LIST_ROWS = 5      # visible rows per facet list in the sidebar
+WORKLOAD_BARS = "·▁▂▃▄▅▆▇█"
+BUCKET_CACHE_MONTHS = 6  # month buckets kept by CalendarView
+
+def parse_deadline(s):
+    """Parse a YYYY-MM-DD deadline to a date, or None if it is missing/invalid."""
+    try:
+        # fromisoformat is ~20x faster than strptime; strptime still takes e.g. "2025-1-5"
+        return date.fromisoformat(s)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.strptime(s, DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+class TaskIndex:
+    """
+    Derived data for each task, computed once when the task is loaded or edited
+    so that sorting and redraws never parse strings:
+    - by_id: task id -> task dict
+    - deadlines: task id -> parsed deadline date (or None)
+    - sort_keys: task id -> (done last, deadline, priority, insertion order)
+    - overdue: ids of open tasks past their deadline; only recomputed for
+      every task when the date rolls over
+    - day_ids: deadline string -> ids due that day (insertion ordered)
+    - search: an inverted index token -> ids over SEARCH_FIELDS, plus a
+      trigram -> tokens index over the token vocabulary
+    - facet_ids: field -> lowercased value -> ids, for each of FACET_FIELDS;
+      len() of a set is that value's count, kept current on every change
+      (facet_names keeps a display spelling per value)
+    - due_days: sorted distinct deadline dates (bisect range queries) with
+      date_ids: date -> ids, and open_per_day: date -> open task count whose
+      prefix sums answer "how many open tasks between a and b" in O(log n)
+    - version: bumped on every change, so cached query results can be reused
+    """
+    def __init__(self, tasks=()):
+        self.today = date.today()
+        self.rebuild(tasks)
+
+    def rebuild(self, tasks):
+        self.by_id = {}
+        self.deadlines = {}
+        self.sort_keys = {}
+        self.seq = {}
+        self.overdue = set()
+        self.day_ids = {}
+        self.day_of = {}         # id -> deadline string it is bucketed under
+        self.task_tokens = {}    # id -> tokens of that task
+        self.postings = {}       # token -> set of ids
+        self.gram_tokens = {}    # trigram -> set of tokens
+        self.facet_ids = {f: {} for f in FACET_FIELDS}
+        self.facet_names = {f: {} for f in FACET_FIELDS}
+        self.facet_of = {}       # id -> lowercased FACET_FIELDS values
+        self.due_days = []       # sorted dates that have at least one task
+        self.date_ids = {}       # date -> set of ids
+        self.open_per_day = {}   # date -> number of open tasks
+        self._open_prefix = None # prefix sums of open_per_day over due_days, built on demand
+        self._next_seq = 0
+        self.version = 0
+        for t in tasks:
+            self.update(t)
+
+    def update(self, task):
+        """(Re)index a task after it was added or changed."""
+        tid = task["id"]
+        self.version += 1
+        self.by_id[tid] = task
+        deadline = task.get("deadline", "")
+        same_deadline = tid in self.deadlines and self.day_of.get(tid) == deadline
+        if not same_deadline:
+            self._unbucket(tid)
+            self.day_of[tid] = deadline
+            self.day_ids.setdefault(deadline, {})[tid] = None
+        self._index_tokens(tid, {tok for k in SEARCH_FIELDS for tok in str(task.get(k, "")).lower().split()})
+        raw = tuple(str(task.get(f, "")) for f in FACET_FIELDS)
+        self._index_facets(tid, tuple(v.lower() for v in raw), raw)
+        d = self.deadlines[tid] if same_deadline else parse_deadline(deadline)
+        done = task.get("status") == "Done"
+        old_key = self.sort_keys.get(tid)
+        self._move_due(tid, self.deadlines.get(tid), old_key is not None and not old_key[0], d, not done)
+        self.deadlines[tid] = d
+        seq = self.seq.get(tid)
+        if seq is None:
+            # insertion order breaks ties, so every sort key is unique (bisect-able)
+            seq = self.seq[tid] = self._next_seq
+            self._next_seq += 1
+        self.sort_keys[tid] = (done, d or date.max, PRIORITY_RANK.get(task.get("priority", "Medium"), 1), seq)
+        if not done and d is not None and d < self.today:
+            self.overdue.add(tid)
+        else:
+            self.overdue.discard(tid)
+
+    def remove(self, tid):
+        self.version += 1
+        old_key = self.sort_keys.get(tid)
+        self._move_due(tid, self.deadlines.get(tid), old_key is not None and not old_key[0], None, False)
+        self._index_tokens(tid, set())
+        self._index_facets(tid, None)
+        self._unbucket(tid)
+        self.by_id.pop(tid, None)
+        self.deadlines.pop(tid, None)
+        self.sort_keys.pop(tid, None)
+        self.seq.pop(tid, None)
+        self.overdue.discard(tid)
+
+    def check_rollover(self):
+        """Recompute overdue flags if the date changed since the last check."""
+        today = date.today()
+        if today == self.today:
+            return False
+        self.version += 1  # "overdue" and relative due: results change with the date
+        self.today = today
+        self.overdue = {tid for tid, d in self.deadlines.items()
+                        if d is not None and d < today and not self.sort_keys[tid][0]}
+        return True
+
+    def _unbucket(self, tid):
+        deadline = self.day_of.pop(tid, None)
+        ids = self.day_ids.get(deadline)
+        if ids is not None:
+            ids.pop(tid, None)
+            if not ids:
+                del self.day_ids[deadline]
+
+    # ---------- deadline ranges ----------
+    def _move_due(self, tid, old_d, old_open, new_d, new_open):
+        if old_d == new_d and old_open == new_open:
+            return
+        self._open_prefix = None
+        if old_d is not None:
+            if old_d != new_d:
+                ids = self.date_ids[old_d]
+                ids.discard(tid)
+                if not ids:
+                    del self.date_ids[old_d]
+                    del self.due_days[bisect.bisect_left(self.due_days, old_d)]
+            if old_open:
+                self.open_per_day[old_d] -= 1
+                if not self.open_per_day[old_d]:
+                    del self.open_per_day[old_d]
+        if new_d is not None:
+            if old_d != new_d:
+                ids = self.date_ids.get(new_d)
+                if ids is None:
+                    ids = self.date_ids[new_d] = set()
+                    bisect.insort(self.due_days, new_d)
+                ids.add(tid)
+            if new_open:
+                self.open_per_day[new_d] = self.open_per_day.get(new_d, 0) + 1
+
+    def _day_range(self, start, end):
+        """Slice bounds of due_days within [start, end] (None = unbounded)."""
+        lo = 0 if start is None else bisect.bisect_left(self.due_days, start)
+        hi = len(self.due_days) if end is None else bisect.bisect_right(self.due_days, end)
+        return lo, hi
+
+    def due_between(self, start=None, end=None):
+        """Ids of tasks due in [start, end] (dates, None = unbounded): O(log n + k)."""
+        lo, hi = self._day_range(start, end)
+        date_ids = self.date_ids
+        return set().union(*(date_ids[d] for d in self.due_days[lo:hi]))
+
+    def _prefix(self):
+        if self._open_prefix is None:
+            prefix, total = [0], 0
+            for d in self.due_days:
+                total += self.open_per_day.get(d, 0)
+                prefix.append(total)
+            self._open_prefix = prefix
+        return self._open_prefix
+
+    def open_count_between(self, start=None, end=None):
+        """Number of open tasks due in [start, end], from prefix sums."""
+        lo, hi = self._day_range(start, end)
+        prefix = self._prefix()
+        return prefix[hi] - prefix[lo]
+
+    def workload(self, start, days):
+        """Open tasks due on each of the `days` days from `start` (a per-day histogram)."""
+        prefix = self._prefix()
+        bounds = [bisect.bisect_left(self.due_days, start + timedelta(days=i)) for i in range(days + 1)]
+        return [prefix[b] - prefix[a] for a, b in zip(bounds, bounds[1:])]
+
+    def _index_facets(self, tid, values, names=None):
+        old = self.facet_of.get(tid)
+        if old == values:
+            return
+        none = (None,) * len(FACET_FIELDS)
+        for field, old_v, new_v, name in zip(FACET_FIELDS, old or none, values or none, names or none):
+            if old_v == new_v:
+                continue
+            by_value = self.facet_ids[field]
+            if old_v is not None:
+                ids = by_value[old_v]
+                ids.discard(tid)
+                if not ids:
+                    del by_value[old_v]
+                    del self.facet_names[field][old_v]
+            if new_v is not None:
+                if new_v not in by_value:
+                    by_value[new_v] = set()
+                    self.facet_names[field][new_v] = name
+                by_value[new_v].add(tid)
+        if values is None:
+            self.facet_of.pop(tid, None)
+        else:
+            self.facet_of[tid] = values
+
+    # ---------- search ----------
+    def _index_tokens(self, tid, tokens):
+        old = self.task_tokens.get(tid, set())
+        for tok in old - tokens:
+            ids = self.postings[tok]
+            ids.discard(tid)
+            if not ids:
+                # token left the vocabulary
+                del self.postings[tok]
+                for i in range(len(tok) - 2):
+                    grams = self.gram_tokens.get(tok[i:i + 3])
+                    if grams is not None:
+                        grams.discard(tok)
+                        if not grams:
+                            del self.gram_tokens[tok[i:i + 3]]
+        for tok in tokens - old:
+            ids = self.postings.get(tok)
+            if ids is None:
+                ids = self.postings[tok] = set()
+                for i in range(len(tok) - 2):
+                    self.gram_tokens.setdefault(tok[i:i + 3], set()).add(tok)
+            ids.add(tid)
+        if tokens:
+            self.task_tokens[tid] = tokens
+        else:
+            self.task_tokens.pop(tid, None)
+
+    def _ids_with_substring(self, word):
+        """Ids of tasks having a token that contains `word` (which has no whitespace)."""
+        if len(word) >= 3:
+            tokens = None
+            grams = {word[i:i + 3] for i in range(len(word) - 2)}
+            for g in sorted(grams, key=lambda g: len(self.gram_tokens.get(g, ()))):
+                found = self.gram_tokens.get(g)
+                if not found:
+                    return set()
+                tokens = set(found) if tokens is None else tokens & found
+            tokens = [tok for tok in tokens if word in tok]
+        else:
+            tokens = [tok for tok in self.postings if word in tok]
+        ids = set()
+        for tok in tokens:
+            ids |= self.postings[tok]
+        return ids
+
+    def matches(self, tid, query):
+        task = self.by_id[tid]
+        return any(query in str(task.get(k, "")).lower() for k in SEARCH_FIELDS)
+
+    def search(self, query, within=None):
+        """
+        Ids of tasks where `query` is a case-insensitive substring of any
+        SEARCH_FIELDS value. `within` narrows a previous result set instead
+        of searching everything (valid when the old query is part of the new one).
+        """
+        query = query.strip().lower()
+        if within is not None:
+            return {tid for tid in within if tid in self.by_id and self.matches(tid, query)}
+        if not query:
+            return set(self.by_id)
+        words = query.split()
+        if len(words) == 1:
+            # no whitespace: matching a token is the same as matching the field
+            return self._ids_with_substring(query)
+        candidates = None
+        for w in words:
+            ids = self._ids_with_substring(w)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {tid for tid in candidates if self.matches(tid, query)}
+
+# ---------- Search queries ----------
+QUERY_TERM = re.compile(r'(\w+):(<=|>=|<|>|=)?("[^"]*"?|\S*)|"([^"]*)"?|(\S+)')
+DUE_OPS = {
+    "=": lambda a, b: a == b, "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+
+WEEKDAYS = [d.lower() for d in calendar.day_name]
+
+def _query_date(value):
+    """
+    A due: value as a date, else None: YYYY-MM-DD, 'today', 'tomorrow',
+    'yesterday', +N / -N (days from today) or a weekday name (the next one,
+    today included).
+    """
+    today = date.today()
+    named = {"today": today, "tomorrow": today + timedelta(days=1), "yesterday": today - timedelta(days=1)}
+    if value in named:
+        return named[value]
+    if value in WEEKDAYS:
+        return today + timedelta(days=(WEEKDAYS.index(value) - today.weekday()) % 7)
+    if value[:1] in "+-" and value[1:].isdigit():
+        return today + timedelta(days=int(value))
+    return parse_deadline(value)
+
+class TaskQuery:
+    """
+    A search box query, parsed once. Besides free text it understands:
+        subject:math  category:lab  priority:high  status:"not done"
+            an indexed value (exact, or containing the text if no value is exact)
+        title:essay  notes:draft    text in that field
+        due:2025-10-01  due:<2025-10-01  due:>=today    (=, <, <=, >, >=)
+            also tomorrow, yesterday, +N / -N days, or a weekday (due:<=sunday)
+        overdue
+    All terms must match. ids() answers the indexed terms first (smallest
+    id set first) and only checks the free text and field text on what is left.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.facets = []   # (field, value)
+        self.fields = []   # (field, value) substring checks
+        self.due = []      # (op, date or None for an invalid date)
+        self.overdue = False
+        words = []
+        for m in QUERY_TERM.finditer(text.lower()):
+            key, op, value, quoted, word = m.groups()
+            if key is not None and (key in FACET_FIELDS or key in SEARCH_FIELDS or key == "due"):
+                value = value.strip('"')
+                if key == "due":
+                    self.due.append((op or "=", _query_date(value)))
+                elif key in FACET_FIELDS:
+                    self.facets.append((key, value))
+                else:
+                    self.fields.append((key, value))
+            elif word == "overdue":
+                self.overdue = True
+            else:
+                words.append(m.group(0).strip('"') if quoted is None else quoted)
+        self.free = " ".join(w for w in words if w)
+
+    @property
+    def plain(self):
+        """True for free text only (no terms), which allows narrowing previous results."""
+        return not (self.facets or self.fields or self.due or self.overdue)
+
+    def _facet_ids(self, index, field, value):
+        by_value = index.facet_ids[field]
+        if value in by_value:
+            return by_value[value]
+        return set().union(*(ids for v, ids in by_value.items() if value in v))
+
+    def _due_ids(self, index):
+        """All due: terms folded into one [start, end] range query."""
+        start = end = None
+        one_day = timedelta(days=1)
+        for op, value in self.due:
+            if value is None:
+                return set()
+            lo, hi = {
+                "=": (value, value), "<": (None, value - one_day), "<=": (None, value),
+                ">": (value + one_day, None), ">=": (value, None),
+            }[op]
+            if lo is not None and (start is None or lo > start):
+                start = lo
+            if hi is not None and (end is None or hi < end):
+                end = hi
+        if start is not None and end is not None and start > end:
+            return set()
+        return index.due_between(start, end)
+
+    def ids(self, index, within=None):
+        """Ids of the matching tasks (only looking at `within` if given)."""
+        sets = [self._facet_ids(index, f, v) for f, v in self.facets]
+        if self.due:
+            sets.append(self._due_ids(index))
+        if self.overdue:
+            sets.append(index.overdue)
+        if within is not None:
+            sets.append(within)
+        if sets:
+            sets.sort(key=len)
+            result = set(sets[0]).intersection(*sets[1:])
+        else:
+            result = None
+        if self.free:
+            result = index.search(self.free, within=result)
+        elif result is None:
+            result = set(index.by_id)
+        for field, value in self.fields:
+            by_id = index.by_id
+            result = {tid for tid in result if value in str(by_id[tid].get(field, "")).lower()}
+        return result
+
+    def matches(self, index, tid):
+        """Check a single task (used to patch rows after a change)."""
+        task = index.by_id.get(tid)
+        if task is None:
+            return False
+        facet_of = dict(zip(FACET_FIELDS, index.facet_of[tid]))
+        for field, value in self.facets:
+            v = facet_of[field]
+            if v != value and (value in index.facet_ids[field] or value not in v):
+                return False
+        d = index.deadlines[tid]
+        for op, value in self.due:
+            if value is None or d is None or not DUE_OPS[op](d, value):
+                return False
+        if self.overdue and tid not in index.overdue:
+            return False
+        if self.free and not index.matches(tid, self.free):
+            return False
+        return all(value in str(task.get(field, "")).lower() for field, value in self.fields)
+
+# ---------- Shared task store ----------
+class TaskEvent:
+    """
+    One change published by a TaskStore.
+    - kind: "added", "updated" or "removed"
+    - ids: the ids of the affected tasks
+    - before: id -> copy of the task before the change (absent for added tasks)
+    - old_keys: id -> TaskIndex sort key before the change (absent for added tasks)
+    """
+    __slots__ = ("kind", "ids", "before", "old_keys")
+
+    def __init__(self, kind, ids, before=None, old_keys=None):
+        self.kind = kind
+        self.ids = ids
+        self.before = before or {}
+        self.old_keys = old_keys or {}
+
+class TaskStore:
+    """
+    The homework tasks shared by the planner and the windows it opens.
+    All changes go through add/update/remove, which keep `tasks`, `index`
+    and storage (via the background writer) in step and then call every
+    subscriber with a TaskEvent, so each view redraws only those ids.
+    """
+    def __init__(self, storage):
+        self.storage = storage
+        self.writer = BackgroundWriter(storage)
+        self.tasks = []
+        self.index = TaskIndex()
+        self._listeners = []
+        self._loader = storage.iter_load()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _publish(self, event):
+        for listener in list(self._listeners):
+            listener(event)
+
+    def load_more(self, budget_ms=LOAD_TICK_MS):
+        """
+        Add batches from storage for up to `budget_ms` (at least one batch)
+        and publish them as one event. Returns False once everything is loaded.
+        """
+        if self._loader is None:
+            return False
+        deadline = time.perf_counter() + budget_ms / 1000
+        added = []
+        while True:
+            batch = next(self._loader, None)
+            if batch is None:
+                self._loader = None
+                break
+            self.tasks.extend(batch)
+            for task in batch:
+                self.index.update(task)
+            added.extend(t["id"] for t in batch)
+            if time.perf_counter() >= deadline:
+                break
+        if added:
+            self._publish(TaskEvent("added", added))
+        if self._loader is None:
+            # e.g. ids backfilled into the journal while loading an old file
+            self.storage.maybe_compact(self.tasks)
+            return False
+        return True
+
+    def get(self, tid):
+        return self.index.by_id.get(tid)
+
+    # ---------- queries ----------
+    def _indexed(self):
+        """True if storage can answer the query: it has indexes and the writer's queue is written out."""
+        return self.storage.indexed and self.writer.flush()
+
+    def _tasks_for_ids(self, ids):
+        """Loaded tasks by id; those not loaded yet are read from storage."""
+        by_id = self.index.by_id
+        missing = [i for i in ids if i not in by_id]
+        stored = self.storage.tasks_by_id(missing) if missing else {}
+        return [by_id.get(i) or stored[i] for i in ids]
+
+    def tasks_with_status(self, status):
+        """Tasks with one status, in list order (also those not loaded yet, with indexed storage)."""
+        if self._indexed():
+            return self._tasks_for_ids(self.storage.ids_with_status(status))
+        return [t for t in self.tasks if t.get("status") == status]
+
+    def tasks_due_between(self, start, end):
+        """Tasks due from `start` to `end` (dates, both included), by deadline."""
+        if self._indexed():
+            return self._tasks_for_ids(
+                self.storage.ids_due_between(start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)))
+        index, tasks = self.index, []
+        day = start
+        while day <= end:
+            ids = index.day_ids.get(day.strftime(DATE_FORMAT))
+            if ids:
+                tasks.extend(index.by_id[i] for i in ids)
+            day += timedelta(days=1)
+        return tasks
+
+    def _maybe_compact(self):
+        # while loading, `tasks` is only part of the file; load_more compacts at the end
+        if self._loader is None:
+            self.storage.maybe_compact(self.tasks)
+
+    def add(self, task):
+        """Add a new task (it must already have an id)."""
+        self.add_many([task])
+
+    def add_many(self, tasks):
+        """Add several new tasks: one queued write and one event."""
+        self.tasks.extend(tasks)
+        for task in tasks:
+            self.index.update(task)
+        self.writer.apply([(t["id"], ("put", t)) for t in tasks])
+        self._maybe_compact()
+        self._publish(TaskEvent("added", [t["id"] for t in tasks]))
+
+    def update(self, tid, fields):
+        """Change some fields of a task in place. Returns the previous values of those fields."""
+        return self.update_many({tid: fields})[tid]
+
+    def update_many(self, changes):
+        """
+        Apply {id: fields} in one go: one queued write and one event.
+        Returns {id: previous values of the changed fields}.
+        """
+        index = self.index
+        before, old_keys, previous = {}, {}, {}
+        for tid, fields in changes.items():
+            task = index.by_id[tid]
+            before[tid], old_keys[tid] = dict(task), index.sort_keys[tid]
+            previous[tid] = {k: task.get(k) for k in fields}
+            task.update(fields)
+            index.update(task)
+        self.writer.apply([(tid, ("put", index.by_id[tid])) for tid in changes])
+        self._maybe_compact()
+        self._publish(TaskEvent("updated", list(changes), before, old_keys))
+        return previous
+
+    def remove(self, tid):
+        """Delete a task. Returns the removed task, or None if there was none."""
+        return self.remove_many([tid]).get(tid)
+
+    def remove_many(self, tids):
+        """Delete several tasks with one pass over the list. Returns {id: removed task}."""
+        index = self.index
+        removed = {tid: index.by_id[tid] for tid in tids if tid in index.by_id}
+        if not removed:
+            return {}
+        old_keys = {tid: index.sort_keys[tid] for tid in removed}
+        # in place: the planner and the open windows hold this list
+        self.tasks[:] = [t for t in self.tasks if t["id"] not in removed]
+        for tid in removed:
+            index.remove(tid)
+        self.writer.apply([(tid, ("del", None)) for tid in removed])
+        self._maybe_compact()
+        self._publish(TaskEvent("removed", list(removed), removed, old_keys))
+        return removed
+
+    def close(self):
+        self.writer.close()
+
+UNDO_STEPS = 100          # undo steps kept
+UNDO_TASK_LIMIT = 20000   # task deltas kept across all steps (oldest steps are dropped first)
+
+class TaskHistory:
+    """
+    Undo/redo for changes made through a TaskStore.
+    A step is (label, deltas) with one (id, before, after) per task, where
+    before/after are just the changed fields, or None for "no such task";
+    a whole task is only kept when it is added or deleted. Undo and redo
+    go back through the store's add_many/update_many/remove_many, so every
+    view patches its rows exactly as for the original change.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self._size = 0   # task deltas held by undo_steps
+
+    # ---------- recorded changes ----------
+    def add(self, task, label="Add"):
+        self.store.add(task)
+        self._record(label, [(task["id"], None, dict(task))])
+
+    def update_many(self, changes, label="Edit"):
+        previous = self.store.update_many(changes)
+        deltas = []
+        for tid, fields in changes.items():
+            before = {k: v for k, v in previous[tid].items() if v != fields[k]}
+            if before:
+                deltas.append((tid, before, {k: fields[k] for k in before}))
+        self._record(label, deltas)
+
+    def remove_many(self, tids, label="Delete"):
+        removed = self.store.remove_many(tids)
+        self._record(label, [(tid, task, None) for tid, task in removed.items()])
+        return removed
+
+    def _record(self, label, deltas):
+        if not deltas:
+            return
+        self.undo_steps.append((label, deltas))
+        self._size += len(deltas)
+        while len(self.undo_steps) > UNDO_STEPS or (self._size > UNDO_TASK_LIMIT and len(self.undo_steps) > 1):
+            self._size -= len(self.undo_steps.popleft()[1])
+        self.redo_steps.clear()
+
+    # ---------- undo / redo ----------
+    def _apply(self, deltas, side):
+        """Bring each task to its `side` state (1 = before, 2 = after) in at most three batched calls."""
+        by_id = self.store.index.by_id
+        removals, additions, updates = [], [], {}
+        for delta in deltas:
+            tid, target = delta[0], delta[side]
+            if target is None:
+                removals.append(tid)
+            elif tid not in by_id:
+                additions.append(dict(target))   # the stored copy stays untouched
+            else:
+                updates[tid] = dict(target)
+        if removals:
+            self.store.remove_many(removals)
+        if additions:
+            self.store.add_many(additions)
+        if updates:
+            self.store.update_many(updates)
+
+    def undo(self):
+        """Revert the last step. Returns its label, or None if there was nothing to undo."""
+        if not self.undo_steps:
+            return None
+        label, deltas = self.undo_steps.pop()
+        self._size -= len(deltas)
+        self._apply(deltas, 1)
+        self.redo_steps.append((label, deltas))
+        return label
+
+    def redo(self):
+        """Re-apply the last undone step. Returns its label, or None."""
+        if not self.redo_steps:
+            return None
+        label, deltas = self.redo_steps.pop()
+        self._apply(deltas, 2)
+        self.undo_steps.append((label, deltas))
+        self._size += len(deltas)
+        return label
+
+# ---------- Study plan ----------
+STUDY_HOURS_PER_DAY = 3.0  # study time the plan fills on each day
+PRIORITY_LEAD_DAYS = {"High": 2, "Medium": 1, "Low": 0}  # planned as if due this much earlier
+
+def task_estimate(task):
+    """The task's optional estimate_hours as a positive float, else None."""
+    try:
+        hours = float(task.get("estimate_hours") or 0)
+    except (TypeError, ValueError):
+        return None
+    return hours if hours > 0 else None
+
+class StudySchedule:
+    """
+    Earliest-deadline-first study plan for open tasks that have an estimate.
+    - tasks are taken in order of deadline minus PRIORITY_LEAD_DAYS (then
+      priority, then insertion) and their hours packed into days of
+      STUDY_HOURS_PER_DAY starting today; a task whose last block lands
+      after its real deadline is infeasible
+    - the plan is greedy in that order, so a change only re-packs from the
+      earliest affected task onward (the cursor after every task is kept)
+    - store events just record where the plan went stale; refresh() re-packs
+      and returns the dates whose blocks changed
+    """
+    def __init__(self, store, hours_per_day=STUDY_HOURS_PER_DAY):
+        self.store = store
+        self.hours_per_day = hours_per_day
+        self.start = date.today()
+        self.keys = []           # sorted (weighted deadline, priority rank, seq, id)
+        self.key_of = {}         # id -> its key in keys
+        self.allocs = {}         # id -> [(date, hours), ...]
+        self.cursor_after = {}   # id -> (date, hours used that day) after packing it
+        self.blocks = {}         # date -> {id: hours}
+        self.infeasible = set()
+        self.late_deadlines = {} # infeasible id -> its deadline
+        self._stale_from = None  # smallest key whose packing is out of date
+        self._changed = set()    # dates touched since the last refresh()
+        for task in store.tasks:
+            self._place(task["id"])
+        store.subscribe(self._on_store_event)
+
+    def _key(self, tid):
+        task = self.store.get(tid)
+        if task is None or task.get("status") == "Done" or task_estimate(task) is None:
+            return None
+        d = self.store.index.deadlines.get(tid)
+        if d is None:
+            return None
+        priority = task.get("priority", "Medium")
+        lead = timedelta(days=PRIORITY_LEAD_DAYS.get(priority, 0))
+        return (d - lead, PRIORITY_RANK.get(priority, 1), self.store.index.seq[tid], tid)
+
+    def _mark_stale(self, key):
+        if self._stale_from is None or key < self._stale_from:
+            self._stale_from = key
+
+    def _place(self, tid):
+        """Move the task to its current position in the order (or drop it)."""
+        old = self.key_of.pop(tid, None)
+        if old is not None:
+            del self.keys[bisect.bisect_left(self.keys, old)]
+            self._free(tid)
+            self._mark_stale(old)
+        key = self._key(tid)
+        if key is not None:
+            bisect.insort(self.keys, key)
+            self.key_of[tid] = key
+            self._mark_stale(key)
+
+    def _free(self, tid):
+        for day, _ in self.allocs.pop(tid, ()):
+            hours = self.blocks.get(day)
+            if hours is not None:
+                hours.pop(tid, None)
+                if not hours:
+                    del self.blocks[day]
+            self._changed.add(day)
+        self.cursor_after.pop(tid, None)
+        if tid in self.infeasible:
+            self.infeasible.discard(tid)
+            self._changed.add(self.late_deadlines.pop(tid))
+
+    def _on_store_event(self, event):
+        for tid in event.ids:
+            self._place(tid)
+
+    def refresh(self):
+        """Re-pack from the first stale task on. Returns the dates whose blocks changed."""
+        if self.start != date.today():
+            # new day: nothing can be planned in the past any more
+            self.start = date.today()
+            for tid in list(self.allocs):
+                self._free(tid)
+            self._stale_from = self.keys[0] if self.keys else None
+        if self._stale_from is not None:
+            self._pack(bisect.bisect_left(self.keys, self._stale_from))
+            self._stale_from = None
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def _pack(self, pos):
+        if pos > 0:
+            day, used = self.cursor_after[self.keys[pos - 1][3]]
+        else:
+            day, used = self.start, 0.0
+        one_day = timedelta(days=1)
+        deadlines = self.store.index.deadlines
+        for _, _, _, tid in self.keys[pos:]:
+            self._free(tid)
+            hours = task_estimate(self.store.get(tid))
+            allocs = []
+            while hours > 1e-9:
+                room = self.hours_per_day - used
+                if room <= 1e-9:
+                    day, used = day + one_day, 0.0
+                    continue
+                step = min(room, hours)
+                allocs.append((day, step))
+                self.blocks.setdefault(day, {})[tid] = step
+                self._changed.add(day)
+                used += step
+                hours -= step
+            self.allocs[tid] = allocs
+            self.cursor_after[tid] = (day, used)
+            if allocs[-1][0] > deadlines[tid]:
+                # the deadline's calendar cell shows the ⚠ too
+                self.infeasible.add(tid)
+                self.late_deadlines[tid] = deadlines[tid]
+                self._changed.add(deadlines[tid])
+
+    def hours_on(self, day):
+        """Planned study hours on a date."""
+        return sum(self.blocks.get(day, {}).values())
+
+    def blocks_on(self, day):
+        """[(task, hours)] planned on a date, in plan order."""
+        blocks = sorted(self.blocks.get(day, {}).items(), key=lambda b: self.key_of[b[0]])
+        return [(self.store.get(tid), h) for tid, h in blocks]
+
+# ---------- Export ----------
+EXPORT_FORMATS = ("csv", "ics")
+EXPORT_FIELDS = TASK_FIELDS + ("estimate_hours",)
+EXPORT_BUFFER_BYTES = 1 << 16   # file buffer size; rows are written as the generator yields them
+ICS_PRIORITY = {"High": 1, "Medium": 5, "Low": 9}
+
+def iter_export_tasks(filter=None):
+    """
+    Tasks to export, one at a time. Without a filter they stream straight
+    from storage in stored order; a filter (TaskQuery text) needs the index,
+    so the tasks are loaded first and yielded in the planner's default order.
+    """
+    storage = get_storage()
+    if not filter:
+        for batch in storage.iter_load():
+            yield from batch
+        return
+    index = TaskIndex(storage.load())
+    ids = TaskQuery(filter).ids(index)
+    for tid in sorted(ids, key=index.sort_keys.__getitem__):
+        yield index.by_id[tid]
+
+def _ics_text(value):
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _ics_fold(line):
+    """Fold a content line at 75 octets (RFC 5545), never inside a UTF-8 sequence."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+def _iter_ics_lines(tasks):
+    """VCALENDAR lines: one all-day VEVENT per task with a valid deadline."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Student Tools//Homework Planner//EN"
+    yield "CALSCALE:GREGORIAN"
+    for task in tasks:
+        due = parse_deadline(task.get("deadline", ""))
+        if due is None:
+            continue
+        summary = " - ".join(p for p in (task.get("subject", ""), task.get("title", "")) if p)
+        if task.get("status") == "Done":
+            summary = "✅ " + summary
+        yield "BEGIN:VEVENT"
+        yield f"UID:{task['id']}@homework-planner"
+        yield f"DTSTAMP:{stamp}"
+        yield f"DTSTART;VALUE=DATE:{due:%Y%m%d}"
+        yield f"DTEND;VALUE=DATE:{due + timedelta(days=1):%Y%m%d}"
+        yield _ics_fold("SUMMARY:" + _ics_text(summary))
+        if task.get("notes"):
+            yield _ics_fold("DESCRIPTION:" + _ics_text(task["notes"]))
+        if task.get("category"):
+            yield _ics_fold("CATEGORIES:" + _ics_text(task["category"]))
+        yield f"PRIORITY:{ICS_PRIORITY.get(task.get('priority'), 0)}"
+        yield "END:VEVENT"
+    yield "END:VCALENDAR"
+
+def export_homework(path, fmt=None, filter=None, tasks=None):
+    """
+    Write tasks to `path` as CSV or iCalendar (fmt 'csv' / 'ics', default
+    from the file extension) and return how many tasks were written.
+    `tasks` is any iterable in export order (the planner passes its current
+    rows); otherwise iter_export_tasks(filter) is used. Tasks without a
+    valid deadline are left out of .ics files. Tasks are consumed
+    one at a time into a buffered temp file that is renamed over `path`,
+    so memory stays flat however many tasks there are.
+    """
+    path = Path(path)
+    fmt = (fmt or path.suffix.lstrip(".")).lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    if tasks is None:
+        tasks = iter_export_tasks(filter)
+    count = 0
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_BYTES) as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_FIELDS)
+                for task in tasks:
+                    writer.writerow(["" if task.get(k) is None else task[k] for k in EXPORT_FIELDS])
+                    count += 1
+            else:
+                for line in _iter_ics_lines(tasks):
+                    f.write(line)
+                    f.write("\r\n")
+                    count += line == "BEGIN:VEVENT"
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return count
 
 # ---------- Calendar Popup (pure Tkinter) ----------
 class CalendarPopup(tk.Toplevel):
@@ -195,14 +1679,21 @@ class CalendarView(tk.Toplevel):
     A monthly calendar view that shows the count of tasks on each day.
     - Click a day to list tasks below (Subject / Title / Status)
     - Navigate months
+    - Follows the TaskStore: a change only redraws the days it touches
+    - With a StudySchedule, shows the planned study hours per day and marks
+      tasks that cannot be finished by their deadline with ⚠
     """
-    def __init__(self, parent, tasks, theme):
+    def __init__(self, parent, store, theme, schedule=None):
         super().__init__(parent)
         self.title("Calendar View")
         self.configure(bg=theme["BG_PRIMARY"])
         self.resizable(False, False)
         self.theme = theme
-        self.tasks = tasks  # reference to list
+        self.store = store
+        self.index = store.index
+        self.schedule = schedule
+        self._bucket_cache = {}  # (year, month) -> {deadline: [tasks]}
+        self._listed_date = None
 
         today = date.today()
         self.year = today.year
@@ -254,6 +1745,8 @@ class CalendarView(tk.Toplevel):
             self.cells_frame.grid_columnconfigure(i, minsize=120)
 
         # task list area
+        self.plan_label = tk.Label(outer, text="", bg=self.theme["BG_PRIMARY"], fg=self.theme["ACCENT_RED"])
+        self.plan_label.pack(anchor="w")
         self.list_label = tk.Label(outer, text="Tasks on selected day",
                                    bg=self.theme["BG_PRIMARY"], fg=self.theme["TEXT_SECONDARY"])
         self.list_label.pack(anchor="w")
@@ -261,97 +1754,492 @@ class CalendarView(tk.Toplevel):
                                   fg=self.theme["TEXT_PRIMARY"], selectmode="browse")
         self.listbox.pack(fill="x")
 
+        self._build_cells()
         self._draw_month()
+        store.subscribe(self._on_store_event)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.store.unsubscribe(self._on_store_event)
+
+    def _on_store_event(self, event):
+        """Drop the cached months and redraw the cells of the deadlines involved."""
+        dates = set()
+        for tid in event.ids:
+            dates.add(self.index.day_of.get(tid))
+            old = event.before.get(tid)
+            if old is not None:
+                dates.add(old.get("deadline", ""))
+        dates.discard(None)
+        for ds in dates:
+            d = parse_deadline(ds)
+            if d is not None:
+                self._bucket_cache.pop((d.year, d.month), None)
+        # a re-plan can move study blocks on days no task is due
+        dates |= self._refresh_plan()
+        self._draw_cells(dates)
+        if self._listed_date in dates:
+            self._list_day(self._listed_date)
+
+    def _build_cells(self):
+        """Create the fixed 6x7 grid once; _draw_month only reconfigures it."""
+        self.cells = []
+        for i in range(42):
+            frame = tk.Frame(self.cells_frame, bg=self.theme["BG_SECONDARY"], bd=1, relief="solid")
+            frame.grid(row=i // 7, column=i % 7, padx=2, pady=2, sticky="nsew")
+            day_label = tk.Label(frame, text="", anchor="w",
+                                 bg=self.theme["BG_SECONDARY"], fg=self.theme["TEXT_PRIMARY"])
+            day_label.pack(anchor="nw", padx=4, pady=2)
+            # show up to 2 titles
+            title_labels = []
+            for _ in range(2):
+                lbl = tk.Label(frame, text="", anchor="w",
+                               bg=self.theme["BG_SECONDARY"], fg=self.theme["TEXT_SECONDARY"])
+                lbl.pack(anchor="w", padx=6)
+                title_labels.append(lbl)
+            # button to select day
+            view_btn = tk.Button(frame, text="View", relief="flat",
+                                 bg=self.theme["ACCENT_BLUE"], fg="white",
+                                 activebackground=self.theme["ACCENT_BLUE_HOVER"],
+                                 command=lambda i=i: self._list_day(self.cells[i]["date"]))
+            view_btn.pack(anchor="se", padx=4, pady=4)
+            self.cells.append({"day": day_label, "titles": title_labels, "button": view_btn,
+                               "date": None, "shown": True, "text": ("", "", "")})
+
+    def _refresh_plan(self):
+        """Bring the study plan up to date; returns the changed dates as strings."""
+        if self.schedule is None:
+            return set()
+        changed = {d.strftime(DATE_FORMAT) for d in self.schedule.refresh()}
+        late = len(self.schedule.infeasible)
+        self.plan_label.config(text=f"⚠ {late} task(s) cannot be finished by their deadline at "
+                                    f"{self.schedule.hours_per_day:g}h of study a day" if late else "")
+        return changed
 
     def _draw_month(self):
         self.h_label.config(text=f"{calendar.month_name[self.month]} {self.year}")
-        for w in self.cells_frame.winfo_children():
-            w.destroy()
-
-        cal = calendar.Calendar(firstweekday=0)
-        weeks = cal.monthdayscalendar(self.year, self.month)
-
-        for r, week in enumerate(weeks):
-            for c, d in enumerate(week):
-                frame = tk.Frame(self.cells_frame, bg=self.theme["BG_SECONDARY"], bd=1, relief="solid")
-                frame.grid(row=r, column=c, padx=2, pady=2, sticky="nsew")
-
-                if d == 0:
-                    continue
-
-                # date label
-                tk.Label(frame, text=str(d), anchor="w",
-                         bg=self.theme["BG_SECONDARY"], fg=self.theme["TEXT_PRIMARY"]
-                         ).pack(anchor="nw", padx=4, pady=2)
-
-                # count tasks
+        self._refresh_plan()
+        self._draw_cells()
+        # warm the neighbours so ◀ / ▶ only reconfigure widgets
+        self.after_idle(self._prefetch_adjacent)
+
+    def _draw_cells(self, dates=None):
+        """Update the day cells of the shown month (only those in `dates` if given)."""
+        buckets = self._month_buckets(self.year, self.month)
+        days = [d for week in calendar.Calendar(firstweekday=0).monthdayscalendar(self.year, self.month)
+                for d in week]
+        days += [0] * (42 - len(days))
+
+        for cell, d in zip(self.cells, days):
+            if dates is not None and (d == 0 or f"{self.year:04d}-{self.month:02d}-{d:02d}" not in dates):
+                continue
+            if d == 0:
+                cell["date"] = None
+                texts = ("", "", "")
+            else:
                 date_str = f"{self.year:04d}-{self.month:02d}-{d:02d}"
-                day_tasks = [t for t in self.tasks if t.get("deadline") == date_str]
-
-                # show up to 2 titles
-                for t in day_tasks[:2]:
-                    small = f"· {t.get('subject','')} - {t.get('title','')[:14]}"
-                    tk.Label(frame, text=small, anchor="w",
-                             bg=self.theme["BG_SECONDARY"], fg=self.theme["TEXT_SECONDARY"]
-                             ).pack(anchor="w", padx=6)
-
-                # button to select day
-                tk.Button(frame, text="View", relief="flat",
-                          bg=self.theme["ACCENT_BLUE"], fg="white",
-                          activebackground=self.theme["ACCENT_BLUE_HOVER"],
-                          command=lambda ds=date_str: self._list_day(ds)
-                          ).pack(anchor="se", padx=4, pady=4)
+                cell["date"] = date_str
+                day_tasks = buckets.get(date_str, ())
+                late = self.schedule.infeasible if self.schedule is not None else ()
+                titles = [f"{'⚠' if t['id'] in late else '·'} {t.get('subject','')} - {t.get('title','')[:14]}"
+                          for t in day_tasks[:2]]
+                titles += [""] * (2 - len(titles))
+                hours = self.schedule.hours_on(date(self.year, self.month, d)) if self.schedule is not None else 0
+                texts = (f"{d}   📖 {round(hours, 1):g}h" if hours else str(d), titles[0], titles[1])
+            # only touch widgets whose content actually changed
+            if texts != cell["text"]:
+                cell["day"].config(text=texts[0])
+                cell["titles"][0].config(text=texts[1])
+                cell["titles"][1].config(text=texts[2])
+                cell["text"] = texts
+            shown = d != 0
+            if shown != cell["shown"]:
+                if shown:
+                    cell["button"].pack(anchor="se", padx=4, pady=4)
+                else:
+                    cell["button"].pack_forget()
+                cell["shown"] = shown
 
     def _list_day(self, date_str):
+        if date_str is None:
+            return
+        self._listed_date = date_str
         self.list_label.config(text=f"Tasks on {date_str}")
         self.listbox.delete(0, tk.END)
         items = []
-        for t in self.tasks:
-            if t.get("deadline") == date_str:
-                items.append(f"[{t.get('status','Not Done')}] {t.get('subject','')} - {t.get('title','')}")
+        y, m = int(date_str[:4]), int(date_str[5:7])
+        for t in self._month_buckets(y, m).get(date_str, ()):
+            items.append(f"[{t.get('status','Not Done')}] {t.get('subject','')} - {t.get('title','')}")
+        if self.schedule is not None:
+            late = self.schedule.infeasible
+            for t, hours in self.schedule.blocks_on(parse_deadline(date_str)):
+                items.append(f"📖 Study {round(hours, 1):g}h: {t.get('subject','')} - {t.get('title','')} "
+                             f"(due {t.get('deadline','')}){'  ⚠ not enough time' if t['id'] in late else ''}")
         if not items:
             self.listbox.insert(tk.END, "No tasks.")
         else:
             for it in items:
                 self.listbox.insert(tk.END, it)
 
+    # ---------- deadline buckets ----------
+    def _month_buckets(self, year, month):
+        """deadline string -> tasks for one month, built once per month and cached
+        (store events drop the months they change)."""
+        key = (year, month)
+        buckets = self._bucket_cache.get(key)
+        if buckets is None:
+            buckets = self._build_buckets(year, month)
+            self._bucket_cache[key] = buckets
+            while len(self._bucket_cache) > BUCKET_CACHE_MONTHS:
+                self._bucket_cache.pop(next(iter(self._bucket_cache)))
+        return buckets
+
+    def _build_buckets(self, year, month):
+        last_day = calendar.monthrange(year, month)[1]
+        buckets = {}
+        for t in self.store.tasks_due_between(date(year, month, 1), date(year, month, last_day)):
+            buckets.setdefault(t.get("deadline", ""), []).append(t)
+        return buckets
+
+    def _prefetch_adjacent(self):
+        if not self.winfo_exists():
+            return
+        for y, m in (self._shift_month(-1), self._shift_month(1)):
+            self._month_buckets(y, m)
+
+    def _shift_month(self, delta):
+        m = self.month - 1 + delta
+        return self.year + m // 12, m % 12 + 1
+
     def _prev_month(self):
-        if self.month == 1:
-            self.month, self.year = 12, self.year - 1
-        else:
-            self.month -= 1
+        self.year, self.month = self._shift_month(-1)
         self._draw_month()
 
     def _next_month(self):
-        if self.month == 12:
-            self.month, self.year = 1, self.year + 1
-        else:
-            self.month += 1
+        self.year, self.month = self._shift_month(1)
         self._draw_month()
 
+# ---------- Virtual Table ----------
+class VirtualTable(tk.Frame):
+    """
+    A table that only creates Treeview items for the rows on screen.
+    - `rows` is any sequence of tasks; the table keeps a reference, so the
+      owner mutates it and calls rows_changed() (refresh() if only the
+      tasks' contents changed)
+    - a fixed pool of equal-height Treeview items, one per visible line, is
+      reused while scrolling; row_fn(row, index) -> (values, tags) fills them
+    - selection is tracked by row id, so it survives scrolling and re-sorting
+    - proportional scrollbar, mouse wheel and Up/Down/PageUp/PageDown/Home/End
+    Emits <<TableSelect>> when the selection changes.
+    """
+    def __init__(self, parent, columns, row_fn, id_fn=None, rowheight=26, selectmode="browse",
+                 select_bg="#0969DA", select_fg="white", scroll_style=None, **frame_kw):
+        super().__init__(parent, **frame_kw)
+        self.columns = columns
+        self.row_fn = row_fn
+        self.id_fn = id_fn or (lambda row: row["id"])
+        self.rowheight = rowheight
+        self.selectmode = selectmode
+        self.rows = []
+        self.offset = 0            # index of the row shown in the first slot
+        self.visible = 1           # fully visible lines
+        self.selected = []         # selected row ids, in click order
+        self._anchor = None        # row id where shift-click ranges start
+        self._positions = None     # row id -> index in rows, rebuilt after the rows change
+        self.slots = []            # recycled Treeview item ids
+        self._slot_cache = []      # (values, tags) last written to each slot
+
+        # the Treeview never holds more than len(self.slots) items
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="none", height=1)
+        self.tree.tag_configure("selected", background=select_bg, foreground=select_fg)
+        scroll_kw = {"style": scroll_style} if scroll_style else {}
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview, **scroll_kw)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True, padx=(1, 0), pady=(1, 1))
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_lines(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_lines(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_lines(-self.visible))
+        self.tree.bind("<Next>", lambda e: self._scroll_lines(self.visible))
+        self.tree.bind("<Home>", lambda e: self._scroll_to(0))
+        self.tree.bind("<End>", lambda e: self._scroll_to(len(self.rows)))
+        self._resize_pool(2)
+
+    # ---------- model ----------
+    def set_rows(self, rows):
+        """Show a new row sequence (keeps the scroll position where possible)."""
+        self.rows = rows
+        self.rows_changed()
+
+    def rows_changed(self):
+        """Re-render after rows were added, removed or reordered in place."""
+        self._positions = None
+        self.refresh()
+
+    def index_of(self, row_id):
+        if self._positions is None:
+            id_fn = self.id_fn
+            self._positions = {id_fn(row): i for i, row in enumerate(self.rows)}
+        return self._positions.get(row_id)
+
+    # ---------- rendering ----------
+    def _resize_pool(self, count):
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert("", "end", values=("",) * len(self.columns)))
+            self._slot_cache.append(None)
+        while len(self.slots) > count:
+            self.tree.delete(self.slots.pop())
+            self._slot_cache.pop()
+
+    def _on_configure(self, event):
+        bbox = self.tree.bbox(self.slots[0]) if self.slots else ""
+        header = bbox[1] if bbox else self.rowheight
+        self.visible = max(1, (event.height - header) // self.rowheight)
+        # one spare slot for the partially visible bottom line
+        self._resize_pool(self.visible + 1)
+        self.refresh()
+
+    def refresh(self):
+        """Re-render the on-screen slots from `rows` (O(visible rows))."""
+        n = len(self.rows)
+        self.offset = max(0, min(self.offset, n - self.visible))
+        selected = set(self.selected)
+        for slot, item in enumerate(self.slots):
+            i = self.offset + slot
+            if i < n:
+                row = self.rows[i]
+                values, tags = self.row_fn(row, i)
+                if self.id_fn(row) in selected:
+                    tags = ("selected",)
+            else:
+                values, tags = ("",) * len(self.columns), ()
+            if self._slot_cache[slot] != (values, tags):
+                self.tree.item(item, values=values, tags=tags)
+                self._slot_cache[slot] = (values, tags)
+        if n:
+            self.scrollbar.set(self.offset / n, min(1.0, (self.offset + self.visible) / n))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ---------- scrolling ----------
+    def yview(self, *args):
+        """Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._scroll_lines(step * self.visible if args[2].startswith("page") else step)
+
+    def _scroll_to(self, offset):
+        self.offset = offset
+        self.refresh()
+        return "break"
+
+    def _scroll_lines(self, lines):
+        return self._scroll_to(self.offset + lines)
+
+    def _on_wheel(self, event):
+        return self._scroll_lines(-3 if event.delta > 0 else 3)
+
+    def see(self, index):
+        if index < self.offset:
+            self._scroll_to(index)
+        elif index >= self.offset + self.visible:
+            self._scroll_to(index - self.visible + 1)
+
+    # ---------- selection ----------
+    def selection(self):
+        return tuple(self.selected)
+
+    def selection_set(self, row_ids):
+        self.selected = list(row_ids)
+        self.refresh()
+        self.event_generate("<<TableSelect>>")
+
+    def deselect(self, row_id):
+        if row_id in self.selected:
+            self.selected.remove(row_id)
+            self.event_generate("<<TableSelect>>")
+
+    def set_selectmode(self, mode):
+        """'browse', 'extended' or 'none' (same meaning as Treeview's selectmode)."""
+        self.selectmode = mode
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) in ("heading", "separator"):
+            return None  # let Treeview handle heading clicks and column resizing
+        self.tree.focus_set()
+        item = self.tree.identify_row(event.y)
+        if not item or self.selectmode == "none":
+            return "break"
+        i = self.offset + self.slots.index(item)
+        if i >= len(self.rows):
+            return "break"
+        row_id = self.id_fn(self.rows[i])
+        if self.selectmode == "extended" and event.state & 0x0004:      # Ctrl: toggle
+            if row_id in self.selected:
+                self.selected.remove(row_id)
+            else:
+                self.selected.append(row_id)
+            self._anchor = row_id
+        elif (self.selectmode == "extended" and event.state & 0x0001
+              and self.index_of(self._anchor) is not None):  # Shift: range
+            lo, hi = sorted((self.index_of(self._anchor), i))
+            self.selected = [self.id_fn(self.rows[j]) for j in range(lo, hi + 1)]
+        else:
+            self.selected = [row_id]
+            self._anchor = row_id
+        self.refresh()
+        self.event_generate("<<TableSelect>>")
+        return "break"
+
+    def _move_selection(self, delta):
+        if self.selectmode == "none" or not self.rows:
+            return "break"
+        current = self.index_of(self.selected[-1]) if self.selected else None
+        i = 0 if current is None else max(0, min(len(self.rows) - 1, current + delta))
+        self.selected = [self.id_fn(self.rows[i])]
+        self._anchor = self.selected[0]
+        self.see(i)
+        self.refresh()
+        self.event_generate("<<TableSelect>>")
+        return "break"
+
+# ---------- Facet Sidebar ----------
+class FacetSidebar(tk.Frame):
+    """
+    Subject / Category / Priority / Status lists with task counts.
+    - counts come from TaskIndex.facet_ids, which every change keeps
+      current, so nothing is counted by scanning tasks
+    - a store event only rewrites the rows of the values it touched
+    - clicking a value calls on_pick(field, value); clicking the selected
+      value again calls on_pick(field, None)
+    """
+    def __init__(self, parent, store, theme, on_pick, **frame_kw):
+        super().__init__(parent, **frame_kw)
+        self.store = store
+        self.index = store.index
+        self.on_pick = on_pick
+        self.lists = {}
+        self.values = {f: [] for f in FACET_FIELDS}  # lowercased values, sorted like the rows
+        self.active = {}                              # field -> selected value
+        for field in FACET_FIELDS:
+            tk.Label(self, text=field.title(), anchor="w", bg=frame_kw.get("bg"), fg=theme["TEXT_SECONDARY"],
+                     font=("Segoe UI", 10, "bold")).pack(fill="x", padx=8, pady=(8, 2))
+            lb = tk.Listbox(self, height=FACET_LIST_ROWS, width=22, exportselection=False, activestyle="none",
+                            relief="flat", highlightthickness=0, bg=theme["BG_SECONDARY"],
+                            fg=theme["TEXT_PRIMARY"], selectbackground=theme["ACCENT_BLUE"],
+                            selectforeground="white")
+            lb.pack(fill="x", padx=8)
+            lb.bind("<ButtonRelease-1>", lambda e, f=field: self._on_click(f, e))
+            self.lists[field] = lb
+            for value in sorted(self.index.facet_ids[field]):
+                self._update_value(field, value)
+        store.subscribe(self._on_store_event)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.store.unsubscribe(self._on_store_event)
+
+    def _row_text(self, field, value, count):
+        name = self.index.facet_names[field].get(value, value) or "(none)"
+        return f"{name}  ({count})"
+
+    def _update_value(self, field, value):
+        """Insert, rewrite or drop the row for one value (rows stay sorted by value)."""
+        lb, values = self.lists[field], self.values[field]
+        count = len(self.index.facet_ids[field].get(value, ()))
+        pos = bisect.bisect_left(values, value)
+        present = pos < len(values) and values[pos] == value
+        if present:
+            lb.delete(pos)
+            if not count:
+                del values[pos]
+                if self.active.get(field) == value:
+                    del self.active[field]
+                return
+        elif not count:
+            return
+        else:
+            values.insert(pos, value)
+        lb.insert(pos, self._row_text(field, value, count))
+        if self.active.get(field) == value:
+            lb.selection_set(pos)
+
+    def _on_store_event(self, event):
+        touched = set()
+        facet_of = self.index.facet_of
+        for tid in event.ids:
+            old = event.before.get(tid)
+            if old is not None:
+                touched.update(zip(FACET_FIELDS, (str(old.get(f, "")).lower() for f in FACET_FIELDS)))
+            if tid in facet_of:
+                touched.update(zip(FACET_FIELDS, facet_of[tid]))
+        for field, value in touched:
+            self._update_value(field, value)
+
+    def _on_click(self, field, event):
+        lb, values = self.lists[field], self.values[field]
+        if not values:
+            return
+        value = values[lb.nearest(event.y)]
+        self.on_pick(field, None if self.active.get(field) == value else value)
+
+    def show_active(self, query):
+        """Select the values the search is currently filtering on (query: TaskQuery or None)."""
+        picked = {}
+        if query is not None:
+            for field, value in query.facets:
+                if value in self.index.facet_ids[field]:
+                    picked[field] = value
+        for field, lb in self.lists.items():
+            if picked.get(field) == self.active.get(field):
+                continue
+            lb.selection_clear(0, tk.END)
+            value = picked.get(field)
+            if value is not None:
+                lb.selection_set(bisect.bisect_left(self.values[field], value))
+                self.active[field] = value
+            else:
+                self.active.pop(field, None)
+
 # ---------- Modern GUI Class ----------
 class TaskListWindow(tk.Toplevel):
-    def __init__(self, parent, tasks, status, theme):
+    """
+    Read-only list of the tasks with one status. Store events add, drop or
+    redraw only the rows they touch.
+    """
+    def __init__(self, parent, store, tasks, status, theme):
         super().__init__(parent)
+        self.store = store
+        self.status = status
+        self.rows = tasks
+        self._row_ids = {t["id"] for t in tasks}
         self.title(f"{status} Tasks")
         self.configure(bg=theme["BG_PRIMARY"])
         self.geometry("800x500")
-        
+
         main_frame = tk.Frame(self, bg=theme["BG_PRIMARY"], padx=20, pady=20)
         main_frame.pack(fill="both", expand=True)
-        
+
         table_card = tk.Frame(main_frame, bg=theme["BG_SECONDARY"],
                             highlightbackground=theme["BORDER_COLOR"], highlightthickness=1)
         table_card.pack(fill="both", expand=True)
 
         columns = ("Status", "Subject", "Title", "Category", "Deadline", "Priority", "Notes")
-        self.tree = ttk.Treeview(table_card, columns=columns, show="headings", selectmode="browse")
-
-        scrollbar = ttk.Scrollbar(table_card, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-
-        scrollbar.pack(side="right", fill="y")
-        self.tree.pack(side="left", fill="both", expand=True, padx=(1, 0), pady=(1, 1))
+        self.table = VirtualTable(table_card, columns, row_fn=self._render_row,
+                                  select_bg=theme["ACCENT_BLUE"], bg=theme["BG_SECONDARY"])
+        self.table.pack(fill="both", expand=True)
+        self.tree = self.table.tree
 
         self.tree.column("Status", width=90, anchor="center")
         self.tree.column("Subject", width=140)
@@ -369,16 +2257,40 @@ class TaskListWindow(tk.Toplevel):
         self.tree.tag_configure('done', foreground=theme["TEXT_SECONDARY"])
         self.tree.tag_configure('overdue', foreground=theme["ACCENT_RED"])
 
-        filtered_tasks = [t for t in tasks if t.get("status") == status]
-        for i, task in enumerate(filtered_tasks):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            status_text = "✅ Done" if task.get("status") == "Done" else "❌ Not Done"
-            
-            self.tree.insert("", "end", values=(
-                status_text, task.get("subject", ""), task.get("title", ""),
-                task.get("category", ""), task.get("deadline", ""), task.get("priority", ""),
-                task.get("notes", "")
-            ), tags=(tag,))
+        self.table.set_rows(tasks)
+        store.subscribe(self._on_store_event)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.store.unsubscribe(self._on_store_event)
+
+    def _on_store_event(self, event):
+        gone = set()
+        for tid in event.ids:
+            task = self.store.get(tid)
+            wanted = task is not None and task.get("status") == self.status
+            if tid in self._row_ids and not wanted:
+                self._row_ids.discard(tid)
+                gone.add(tid)
+                self.table.deselect(tid)
+            elif wanted and tid not in self._row_ids:
+                self._row_ids.add(tid)
+                self.rows.append(task)
+        if gone:
+            self.rows[:] = [t for t in self.rows if t["id"] not in gone]
+        self.table.rows_changed()
+
+    def _render_row(self, task, i):
+        # a row read from indexed storage before the task was loaded is a copy
+        task = self.store.get(task["id"]) or task
+        tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+        status_text = "✅ Done" if task.get("status") == "Done" else "❌ Not Done"
+        return (
+            status_text, task.get("subject", ""), task.get("title", ""),
+            task.get("category", ""), task.get("deadline", ""), task.get("priority", ""),
+            task.get("notes", "")
+        ), (tag,)
 
 class HomeworkPlanner:
     def __init__(self, root):
@@ -413,13 +2325,36 @@ class HomeworkPlanner:
         self.FONT_BUTTON = ("Segoe UI", 10, "bold")
 
         self.root.configure(bg=self.theme["BG_PRIMARY"])
-        self.tasks = load_tasks()
-        self.filtered_tasks = list(self.tasks)  # for search/filter
-        self.editing_task_index = None  # index in self.tasks when editing
+        self.store = TaskStore(get_storage())  # shared with the windows opened from here
+        self.schedule = StudySchedule(self.store)
+        self.history = TaskHistory(self.store)  # every change the user makes goes through this
+        self.storage = self.store.storage
+        self.tasks = self.store.tasks
+        self.index = self.store.index
+        self.filtered_tasks = []  # for search/filter
+        self._search_job = None
+        self._load_job = None
+        self._rollover_job = None
+        self._writer_job = None
+        self._last_search = None  # (TaskQuery, index version, result ids)
+        self.saved_filters = load_saved_filters()
+        self._row_keys = []  # sort keys of filtered_tasks, same order (for bisect)
+        self._loading = False     # True while a loaded batch is being published
+        self._rows_shown_at = 0   # len(tasks) when the rows were last rebuilt during loading
+        self._sort_state = None  # (column, reverse) after a header click, None = default order
+        self._sort_cache = {}    # column -> all task ids in ascending order
+        self._sort_cache_version = None
+        self.editing_task_id = None
 
         self._configure_ttk_styles()
         self._create_widgets()
-        self.refresh_table()
+        self.store.subscribe(self._on_store_event)
+        self._load_more(0)  # first screen now, the rest in the background
+        self._schedule_rollover_check()
+        self._writer_job = self.root.after(WRITER_POLL_MS, self._poll_writer)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        # the dashboard replaces WM_DELETE_WINDOW, so the store is closed on <Destroy>
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
 
     def _configure_ttk_styles(self):
         style = ttk.Style(self.root)
@@ -490,7 +2425,7 @@ class HomeworkPlanner:
         self.category_var = tk.StringVar(value="")
         self.category_cb = ttk.Combobox(
             input_frame, textvariable=self.category_var,
-            values=["", "Math", "Science", "English", "History", "Computer", "Other"],
+            values=list(CATEGORIES),
             state="readonly", font=self.FONT_INPUT, style="TCombobox"
         )
         self.category_cb.grid(row=0, column=5, sticky="ew")
@@ -531,14 +2466,19 @@ class HomeworkPlanner:
         self.priority_var = tk.StringVar(value="Medium")
         priority_cb = ttk.Combobox(
             input_frame, textvariable=self.priority_var,
-            values=["Low", "Medium", "High"], state="readonly",
+            values=list(PRIORITIES), state="readonly",
             font=self.FONT_INPUT, style="TCombobox"
         )
         priority_cb.grid(row=1, column=3, sticky="ew", padx=(0, 15))
 
         self._create_labeled_entry(input_frame, "Notes:", 2, 0)
         self.notes_entry = self._create_styled_entry(input_frame)
-        self.notes_entry.grid(row=2, column=1, columnspan=5, sticky="ew")
+        self.notes_entry.grid(row=2, column=1, columnspan=3, sticky="ew", padx=(0, 15))
+
+        # optional: hours of work, used by the study plan in the calendar
+        self._create_labeled_entry(input_frame, "Estimate (h):", 2, 4)
+        self.estimate_entry = self._create_styled_entry(input_frame)
+        self.estimate_entry.grid(row=2, column=5, sticky="ew")
 
         # ---------- Actions ----------
         btn_frame = tk.Frame(main_frame, bg=self.theme["BG_PRIMARY"])
@@ -585,9 +2525,39 @@ class HomeworkPlanner:
         )
         self.list_not_done_button.pack(side="left", expand=True, fill="x", padx=5)
 
+        # bulk changes for the selected rows
+        self.priority_menu_button = self._create_menu_button(
+            btn_frame2, "Set Priority ▾", self.theme["ACCENT_AMBER"], self.theme["ACCENT_AMBER_HOVER"],
+            [(p, lambda p=p: self._set_field("priority", p)) for p in PRIORITIES]
+        )
+        self.priority_menu_button.pack(side="left", expand=True, fill="x", padx=5)
+
+        self.category_menu_button = self._create_menu_button(
+            btn_frame2, "Set Category ▾", self.theme["ACCENT_AMBER"], self.theme["ACCENT_AMBER_HOVER"],
+            [(c or "(none)", lambda c=c: self._set_field("category", c)) for c in CATEGORIES]
+        )
+        self.category_menu_button.pack(side="left", expand=True, fill="x", padx=5)
+
+        self.export_menu_button = self._create_menu_button(
+            btn_frame2, "Export ▾", self.theme["ACCENT_BLUE"], self.theme["ACCENT_BLUE_HOVER"],
+            [("CSV…", lambda: self._export("csv")), ("Calendar (.ics)…", lambda: self._export("ics"))]
+        )
+        self.export_menu_button.pack(side="left", expand=True, fill="x", padx=5)
+
+        self.undo_button = self._create_styled_button(
+            btn_frame2, "↶ Undo", self.theme["ACCENT_GREY"], self.theme["ACCENT_GREY_HOVER"], self._undo
+        )
+        self.undo_button.pack(side="left", expand=True, fill="x", padx=5)
+
+        self.redo_button = self._create_styled_button(
+            btn_frame2, "↷ Redo", self.theme["ACCENT_GREY"], self.theme["ACCENT_GREY_HOVER"], self._redo
+        )
+        self.redo_button.pack(side="left", expand=True, fill="x", padx=5)
+        self._update_undo_buttons()
+
         self.calview_button = self._create_styled_button(
             btn_frame2, "Calendar View", self.theme["ACCENT_BLUE"], self.theme["ACCENT_BLUE_HOVER"],
-            lambda: CalendarView(self.root, self.tasks, self.theme)
+            lambda: CalendarView(self.root, self.store, self.theme, self.schedule)
         )
         self.calview_button.pack(side="left", expand=True, fill="x", padx=5)
 
@@ -611,7 +2581,8 @@ class HomeworkPlanner:
                                      highlightthickness=1, highlightcolor=self.theme["ACCENT_BLUE"],
                                      highlightbackground=self.theme["BORDER_COLOR"])
         self.search_entry.pack(side="left", fill="x", expand=True, padx=(8, 8))
-        self.search_entry.bind("<KeyRelease>", lambda e: self._apply_search())
+        # fires on text changes only (not arrows/shift), debounced
+        self.search_var.trace_add("write", lambda *_: self._schedule_search())
 
         clear_btn = self._create_styled_button(
             search_frame, "Clear", self.theme["ACCENT_GREY"], self.theme["ACCENT_GREY_HOVER"],
@@ -619,20 +2590,58 @@ class HomeworkPlanner:
         )
         clear_btn.pack(side="left")
 
-        # ---------- Table ----------
-        table_card = tk.Frame(main_frame, bg=self.theme["BG_SECONDARY"],
+        # saved filters: pick one to run it, ★ saves the current query
+        self.saved_filter_var = tk.StringVar()
+        self.saved_filter_cb = ttk.Combobox(search_frame, textvariable=self.saved_filter_var, width=18,
+                                            state="readonly", font=self.FONT_INPUT, style="TCombobox")
+        self.saved_filter_cb.pack(side="left", padx=(8, 4))
+        self.saved_filter_cb.bind("<<ComboboxSelected>>", self._apply_saved_filter)
+        self._refresh_saved_filters()
+        self._create_styled_button(
+            search_frame, "★ Save", self.theme["ACCENT_BLUE"], self.theme["ACCENT_BLUE_HOVER"],
+            self._save_current_filter
+        ).pack(side="left", padx=(0, 4))
+        self._create_styled_button(
+            search_frame, "✕", self.theme["ACCENT_GREY"], self.theme["ACCENT_GREY_HOVER"],
+            self._delete_saved_filter
+        ).pack(side="left")
+
+        # quick filters and the open-task workload for the coming days
+        quick_frame = tk.Frame(search_card, bg=self.theme["BG_SECONDARY"], padx=12)
+        quick_frame.pack(fill="x", pady=(0, 8))
+        for text, query in QUICK_FILTERS:
+            tk.Button(quick_frame, text=text, relief="flat", cursor="hand2",
+                      bg=self.theme["BG_PRIMARY"], fg=self.theme["ACCENT_BLUE"],
+                      activebackground=self.theme["BG_SECONDARY"], font=self.FONT_LABEL,
+                      command=lambda q=query: self._run_query(q)).pack(side="left", padx=(0, 6))
+        self.workload_label = tk.Label(quick_frame, text="", bg=self.theme["BG_SECONDARY"],
+                                       fg=self.theme["TEXT_SECONDARY"], font=self.FONT_LABEL)
+        self.workload_label.pack(side="right")
+
+        # ---------- Facets + Table ----------
+        body = tk.Frame(main_frame, bg=self.theme["BG_PRIMARY"])
+        body.pack(fill="both", expand=True)
+        self.facets = FacetSidebar(body, self.store, self.theme, self._pick_facet, bg=self.theme["BG_PRIMARY"])
+        self.facets.pack(side="left", fill="y", padx=(0, 12))
+
+        table_card = tk.Frame(body, bg=self.theme["BG_SECONDARY"],
                               highlightbackground=self.theme["BORDER_COLOR"], highlightthickness=1)
-        table_card.pack(fill="both", expand=True)
+        table_card.pack(side="left", fill="both", expand=True)
 
         columns = ("Status", "Subject", "Title", "Category", "Deadline", "Priority", "Notes")
-        self.tree = ttk.Treeview(table_card, columns=columns, show="headings", selectmode="browse")
+        # only the visible rows exist as Treeview items; filtered_tasks is the model
+        # extended: Ctrl-click / Shift-click / Ctrl+A select several rows for the bulk actions
+        self.table = VirtualTable(table_card, columns, row_fn=self._render_row, rowheight=26,
+                                  selectmode="extended",
+                                  select_bg=self.theme["ACCENT_BLUE"], scroll_style="Vertical.TScrollbar",
+                                  bg=self.theme["BG_SECONDARY"])
+        self.table.pack(fill="both", expand=True)
+        self.tree = self.table.tree
         self.tree.bind("<Double-1>", lambda e: self._load_task_for_edit())
-
-        scrollbar = ttk.Scrollbar(table_card, orient="vertical", command=self.tree.yview, style="Vertical.TScrollbar")
-        self.tree.configure(yscrollcommand=scrollbar.set)
-
-        scrollbar.pack(side="right", fill="y")
-        self.tree.pack(side="left", fill="both", expand=True, padx=(1, 0), pady=(1, 1))
+        self.tree.bind("<Control-a>", self._select_all)
+        self.root.bind("<Control-z>", self._undo)
+        self.root.bind("<Control-y>", self._redo)
+        self.root.bind("<Control-Shift-Z>", self._redo)
 
         # column widths
         self.tree.column("Status", width=90, anchor="center")
@@ -644,7 +2653,7 @@ class HomeworkPlanner:
         self.tree.column("Notes", width=300)
 
         for col in columns:
-            self.tree.heading(col, text=col, command=lambda _col=col: self._sort_column(_col, False))
+            self.tree.heading(col, text=col, command=lambda _col=col: self._sort_column(_col))
 
         # row styles
         self.tree.tag_configure('oddrow', background=self.theme["BG_SECONDARY"])
@@ -674,84 +2683,323 @@ class HomeworkPlanner:
         btn.bind("<Leave>", lambda e: e.widget.config(bg=bg))
         return btn
 
+    def _create_menu_button(self, parent, text, bg, bg_hover, items):
+        """A styled button that drops down a menu of (label, command) items."""
+        btn = tk.Menubutton(parent, text=text, bg=bg, fg="white", activebackground=bg_hover,
+                            activeforeground="white", relief="flat", cursor="hand2",
+                            font=self.FONT_BUTTON, pady=5, direction="below")
+        menu = tk.Menu(btn, tearoff=False)
+        for label, command in items:
+            menu.add_command(label=label, command=command)
+        btn["menu"] = menu
+        btn.bind("<Enter>", lambda e: e.widget.config(bg=bg_hover))
+        btn.bind("<Leave>", lambda e: e.widget.config(bg=bg))
+        return btn
+
     def _toggle_buttons_state(self, state):
-        for button in [self.edit_button, self.delete_button, self.mark_done_button, self.mark_not_done_button]:
+        for button in [self.edit_button, self.delete_button, self.mark_done_button, self.mark_not_done_button,
+                       self.priority_menu_button, self.category_menu_button]:
             button.config(state=state)
 
     # ---------- sorting / search ----------
-    def _sort_column(self, col, reverse):
+    def _sort_column(self, col):
+        # header clicks cycle: ascending -> descending -> default order
+        if self._sort_state == (col, False):
+            self._sort_state = (col, True)
+        elif self._sort_state == (col, True):
+            self._sort_state = None
+        else:
+            self._sort_state = (col, False)
+        self.refresh_table()
+
+    def _column_key(self, col):
+        """Typed sort key for a column, as a function of task id."""
+        idx = self.index
+        if col == "Status":
+            return lambda tid: idx.sort_keys[tid][0]
+        if col == "Deadline":
+            return lambda tid: idx.deadlines[tid] or date.max
+        if col == "Priority":
+            return lambda tid: PRIORITY_RANK.get(idx.by_id[tid].get("priority", "Medium"), 1)
+        field = col.lower()
+        return lambda tid: str(idx.by_id[tid].get(field, "")).casefold()
+
+    def _column_order(self, col):
+        """Every task id ordered by `col`, cached until the next mutation."""
+        if self._sort_cache_version != self.index.version:
+            self._sort_cache = {}
+            self._sort_cache_version = self.index.version
+        order = self._sort_cache.get(col)
+        if order is None:
+            key, sort_keys = self._column_key(col), self.index.sort_keys
+            # ties fall back to the default order
+            order = sorted(self.index.by_id, key=lambda tid: (key(tid), sort_keys[tid]))
+            self._sort_cache[col] = order
+        return order
+
+    def _apply_column_sort(self):
+        col, reverse = self._sort_state
+        order = self._column_order(col)
+        if reverse:
+            order = reversed(order)
+        by_id = self.index.by_id
+        if self._last_search is None:
+            self.filtered_tasks = [by_id[i] for i in order]
+        else:
+            ids = self._last_search[2]
+            self.filtered_tasks = [by_id[i] for i in order if i in ids]
+        self.table.set_rows(self.filtered_tasks)
+
+    def _update_headings(self):
+        for col in self.table.columns:
+            arrow = ""
+            if self._sort_state is not None and self._sort_state[0] == col:
+                arrow = " ▼" if self._sort_state[1] else " ▲"
+            self.tree.heading(col, text=col + arrow)
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_search)
+
+    # ---------- loading ----------
+    def _load_more(self, budget_ms=LOAD_TICK_MS):
+        """
+        Load tasks for up to `budget_ms`, then yield to Tk until the next tick.
+        The rows are rebuilt when the task count has doubled since the last
+        rebuild (and once at the end), so loading n tasks re-sorts O(n) rows
+        in total instead of O(n) per tick.
+        """
+        self._load_job = None
+        self._loading = True
         try:
-            data = [(self.tree.set(child, col), child) for child in self.tree.get_children('')]
-            data.sort(reverse=reverse)
-            for i, item in enumerate(data):
-                self.tree.move(item[1], '', i)
-            self.tree.heading(col, command=lambda: self._sort_column(col, not reverse))
-        except tk.TclError:
-            pass
+            more = self.store.load_more(budget_ms)
+        finally:
+            self._loading = False
+        if more:
+            if len(self.tasks) >= 2 * self._rows_shown_at:
+                self._rebuild_rows()
+            self._load_job = self.root.after(1, self._load_more)
+        else:
+            self._rebuild_rows()  # deletes during loading can leave the count unchanged
+
+    def _rebuild_rows(self):
+        self._rows_shown_at = len(self.tasks)
+        self._last_search = None
+        self._apply_search()
 
     def _apply_search(self):
-        query = self.search_var.get().strip().lower()
-        if not query:
+        self._search_job = None
+        text = self.search_var.get().strip()
+        query = TaskQuery(text) if text else None
+        if query is None:
+            self._last_search = None
             self.filtered_tasks = list(self.tasks)
         else:
-            def match(t):
-                return any(
-                    query in str(t.get(k, "")).lower()
-                    for k in ("subject", "title", "notes", "category", "priority", "status")
-                )
-            self.filtered_tasks = [t for t in self.tasks if match(t)]
+            last = self._last_search
+            if (last and last[1] == self.index.version and query.plain and last[0].plain
+                    and last[0].free in query.free):
+                # the text only got longer: filter the previous results
+                ids = query.ids(self.index, within=last[2])
+            else:
+                ids = query.ids(self.index)
+            self._last_search = (query, self.index.version, ids)
+            by_id = self.index.by_id
+            self.filtered_tasks = [by_id[i] for i in ids]
+        self.facets.show_active(query)
         self.refresh_table()
 
     def _clear_search(self):
         self.search_var.set("")
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        self._last_search = None
+        self.saved_filter_var.set("")
         self.filtered_tasks = list(self.tasks)
+        self.facets.show_active(None)
         self.refresh_table()
 
+    # ---------- saved filters ----------
+    def _refresh_saved_filters(self):
+        self.saved_filter_cb["values"] = sorted(self.saved_filters, key=str.lower)
+
+    def _apply_saved_filter(self, event=None):
+        query = self.saved_filters.get(self.saved_filter_var.get())
+        if query is not None:
+            self._run_query(query)
+
+    def _pick_facet(self, field, value):
+        """Swap the search's `field:` term for the clicked facet value (None removes it)."""
+        text = self.search_var.get()
+        kept = [m.group(0) for m in QUERY_TERM.finditer(text) if (m.group(1) or "").lower() != field]
+        if value is not None:
+            kept.append(f'{field}:"{value}"' if " " in value or not value else f"{field}:{value}")
+        self._run_query(" ".join(kept))
+
+    def _run_query(self, query):
+        """Put `query` in the search box and run it right away."""
+        self.search_var.set(query)
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._apply_search()
+
+    def _save_current_filter(self):
+        query = self.search_var.get().strip()
+        if not query:
+            messagebox.showwarning("Save Filter", "Type a search first, e.g. subject:math overdue", parent=self.root)
+            return
+        name = simpledialog.askstring("Save Filter", "Name for this filter:", initialvalue=query, parent=self.root)
+        if not name or not name.strip():
+            return
+        self.saved_filters[name.strip()] = query
+        save_saved_filters(self.saved_filters)
+        self._refresh_saved_filters()
+        self.saved_filter_var.set(name.strip())
+
+    def _delete_saved_filter(self):
+        name = self.saved_filter_var.get()
+        if name not in self.saved_filters:
+            return
+        if messagebox.askyesno("Delete Filter", f"Delete the saved filter '{name}'?", parent=self.root):
+            del self.saved_filters[name]
+            save_saved_filters(self.saved_filters)
+            self._refresh_saved_filters()
+            self.saved_filter_var.set("")
+
+    def _export(self, fmt):
+        """Export the rows currently shown (search and column sort applied)."""
+        filetypes = [("CSV", "*.csv")] if fmt == "csv" else [("iCalendar", "*.ics")]
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Homework", defaultextension="." + fmt,
+                                            filetypes=filetypes, initialfile=f"homework.{fmt}")
+        if not path:
+            return
+        try:
+            count = export_homework(path, fmt, tasks=self.filtered_tasks)
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"Could not write {path}:\n{e}", parent=self.root)
+            return
+        messagebox.showinfo("Export", f"Exported {count} task(s) to {path}", parent=self.root)
+
     # ---------- table refresh ----------
     def refresh_table(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
-        # sort by: Done last, deadline, priority
-        priority_map = {"Low": 2, "Medium": 1, "High": 0}
-
-        def safe_dt(s):
-            try:
-                return datetime.strptime(s, DATE_FORMAT)
-            except Exception:
-                return datetime.max
+        self.index.check_rollover()
+        self._update_headings()
+        self._update_workload()
+        if self._sort_state is not None:
+            self._apply_column_sort()
+            return
 
-        self.filtered_tasks.sort(key=lambda t: (
-            t.get("status") == "Done",
-            safe_dt(t.get("deadline", "9999-12-31")),
-            priority_map.get(t.get("priority", "Medium"), 1)
-        ))
+        # sort by: Done last, deadline, priority (keys precomputed in TaskIndex)
+        sort_keys = self.index.sort_keys
+        self.filtered_tasks.sort(key=lambda t: sort_keys[t["id"]])
+        self._row_keys = [sort_keys[t["id"]] for t in self.filtered_tasks]
+        self.table.set_rows(self.filtered_tasks)
 
+    def _update_workload(self):
+        """Histogram of open tasks per day for the next WORKLOAD_DAYS days."""
         today = date.today()
-        for i, task in enumerate(self.filtered_tasks):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            status_tag = 'done' if task.get("status") == "Done" else ''
-            
-            # 添加状态图标
-            status_text = "✅ Done" if task.get("status") == "Done" else "❌ Not Done"
-
-            # overdue?
-            over_tag = ''
-            try:
-                d = datetime.strptime(task.get("deadline", ""), DATE_FORMAT).date()
-                if task.get("status") != "Done" and d < today:
-                    over_tag = 'overdue'
-            except Exception:
-                pass
+        counts = self.index.workload(today, WORKLOAD_DAYS)
+        peak = max(counts) or 1
+        bars = "".join(WORKLOAD_BARS[0] if not c else
+                       WORKLOAD_BARS[1 + (c * (len(WORKLOAD_BARS) - 2)) // peak] for c in counts)
+        week = self.index.open_count_between(today, today + timedelta(days=6))
+        self.workload_label.config(text=f"Next {WORKLOAD_DAYS} days {bars}  ·  {week} open this week")
+
+    def _render_row(self, task, i):
+        return self._row_values(task), self._row_tags(task, i)
+
+    def _row_values(self, task):
+        # 添加状态图标
+        status_text = "✅ Done" if task.get("status") == "Done" else "❌ Not Done"
+        return (
+            status_text, task.get("subject", ""), task.get("title", ""),
+            task.get("category", ""), task.get("deadline", ""), task.get("priority", ""),
+            task.get("notes", "")
+        )
 
-            tags = tuple(t for t in (tag, status_tag, over_tag) if t)
+    def _row_tags(self, task, row):
+        tag = 'evenrow' if row % 2 == 0 else 'oddrow'
+        status_tag = 'done' if task.get("status") == "Done" else ''
+        over_tag = 'overdue' if task["id"] in self.index.overdue else ''
+        return tuple(t for t in (tag, status_tag, over_tag) if t)
+
+    # ---------- row-level patches ----------
+    def _in_current_filter(self, tid):
+        if self._last_search is None:
+            return True
+        return self._last_search[0].matches(self.index, tid)
+
+    def _sync_search_cache(self, tid, present):
+        """Keep the cached search result valid after a single-task change."""
+        if self._last_search is None:
+            return
+        query, _, ids = self._last_search
+        if present:
+            ids.add(tid)
+        else:
+            ids.discard(tid)
+        self._last_search = (query, self.index.version, ids)
+
+    def _on_store_event(self, event):
+        """Apply a TaskStore change: patch single rows, or re-sort once for big batches."""
+        if self._loading:
+            return  # _load_more rebuilds the rows
+        if self._sort_state is None and len(event.ids) <= ROW_PATCH_LIMIT:
+            for tid in event.ids:
+                self._patch_row(tid, event.old_keys.get(tid))
+            # only the on-screen slots are redrawn, so stripes stay correct for free
+            self.table.rows_changed()
+            self._update_workload()
+            return
+        # header sorts re-render from the column's order anyway
+        changed = set(event.ids)
+        by_id = self.index.by_id
+        rows = [t for t in self.filtered_tasks if t["id"] not in changed]
+        for tid in event.ids:
+            present = tid in by_id and self._in_current_filter(tid)
+            if present:
+                rows.append(by_id[tid])
+            elif tid not in by_id:
+                self.table.deselect(tid)
+            self._sync_search_cache(tid, present)
+        self.filtered_tasks = rows
+        self.refresh_table()
 
-            # use iid=task['id'] for reliable selection
-            self.tree.insert("", "end", iid=task.get("id"), values=(
-                status_text, task.get("subject", ""), task.get("title", ""),
-                task.get("category", ""), task.get("deadline", ""), task.get("priority", ""),
-                task.get("notes", "")
-            ), tags=tags)
+    def _patch_row(self, tid, old_key=None):
+        """
+        Move a single task's row to its sorted position (the caller redraws),
+        keeping the current search. old_key is the task's sort key before the
+        change (None for a new task); a task no longer in the index is removed.
+        """
+        if old_key is not None:
+            pos = bisect.bisect_left(self._row_keys, old_key)
+            if pos < len(self._row_keys) and self._row_keys[pos] == old_key:
+                del self._row_keys[pos]
+                del self.filtered_tasks[pos]
+        task = self.index.by_id.get(tid)
+        if task is None or not self._in_current_filter(tid):
+            self.table.deselect(tid)
+            self._sync_search_cache(tid, False)
+        else:
+            self.index.check_rollover()
+            key = self.index.sort_keys[tid]
+            pos = bisect.bisect_left(self._row_keys, key)
+            self._row_keys.insert(pos, key)
+            self.filtered_tasks.insert(pos, task)
+            self._sync_search_cache(tid, True)
+
+    def _schedule_rollover_check(self):
+        """Re-flag overdue tasks just after midnight."""
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay_ms = int((midnight - now).total_seconds() * 1000) + 1000
+        self._rollover_job = self.root.after(delay_ms, self._on_rollover)
+
+    def _on_rollover(self):
+        self.index.check_rollover()
+        self._apply_search()  # re-run the query even if a row patch already noticed the new day
+        self._schedule_rollover_check()
 
     # ---------- CRUD ----------
     def _commit_task(self):
@@ -783,46 +3031,84 @@ class HomeworkPlanner:
             "notes": self.notes_entry.get().strip()
         }
 
-        if self.editing_task_index is not None:
-            # update existing (preserve id & status)
-            task_data["id"] = self.tasks[self.editing_task_index].get("id")
-            task_data["status"] = self.tasks[self.editing_task_index].get("status", "Not Done")
-            self.tasks[self.editing_task_index] = task_data
+        estimate = self.estimate_entry.get().strip()
+        if estimate:
+            try:
+                task_data["estimate_hours"] = float(estimate)
+                if not 0 < task_data["estimate_hours"] < 10000:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Estimate must be a number of hours, e.g. 1.5", parent=self.root)
+                return
+        elif self.editing_task_id is not None and self.store.get(self.editing_task_id) is not None \
+                and "estimate_hours" in self.store.get(self.editing_task_id):
+            task_data["estimate_hours"] = None
+
+        if self.editing_task_id is not None:
+            # update existing (id & status are kept)
+            tid = self.editing_task_id
             self._cancel_edit_mode()
+            if self.store.get(tid) is not None:
+                self.history.update_many({tid: task_data})
         else:
             # new task
             task_data["id"] = str(uuid.uuid4())
             task_data["status"] = "Not Done"
-            self.tasks.append(task_data)
-
-        save_tasks(self.tasks)
-        self.filtered_tasks = list(self.tasks)
-        self.refresh_table()
+            self.history.add(task_data)
         self._clear_inputs()
+        self._update_undo_buttons()
+
+    # ---------- persistence ----------
+    def _poll_writer(self):
+        """Report background save failures on the Tk thread."""
+        error = self.store.writer.take_error()
+        if error is not None:
+            messagebox.showerror("Save Failed",
+                                 f"Could not save homework changes:\n{error}\n\nThey will be retried.",
+                                 parent=self.root)
+        self._writer_job = self.root.after(WRITER_POLL_MS, self._poll_writer)
+
+    def _on_close(self):
+        self.root.destroy()  # <Destroy> closes the store, which writes anything pending
+
+    def _on_destroy(self, event):
+        if event.widget is not self.root:
+            return
+        for job in (self._search_job, self._load_job, self._rollover_job, self._writer_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self._search_job = self._load_job = self._rollover_job = self._writer_job = None
+        self.store.close()
 
     def _get_selected_task_id(self, show_warning=True):
-        selected_item = self.tree.selection()
+        selected_item = self.table.selection()
         if not selected_item:
             if show_warning:
                 messagebox.showwarning("No Selection", "Please select a task from the list.", parent=self.root)
             return None
         return selected_item[0]
 
-    def _find_task_index_by_id(self, tid):
-        for i, t in enumerate(self.tasks):
-            if t.get("id") == tid:
-                return i
-        return None
+    def _get_selected_task_ids(self):
+        """Selected ids that still exist (warns if there are none)."""
+        ids = [tid for tid in self.table.selection() if self.store.get(tid) is not None]
+        if not ids:
+            messagebox.showwarning("No Selection", "Please select one or more tasks from the list.",
+                                   parent=self.root)
+        return ids
+
+    def _select_all(self, event=None):
+        if self.table.selectmode == "extended":
+            self.table.selection_set([t["id"] for t in self.filtered_tasks])
+        return "break"
 
     def _load_task_for_edit(self):
         tid = self._get_selected_task_id()
         if not tid:
             return
-        idx = self._find_task_index_by_id(tid)
-        if idx is None:
+        task = self.store.get(tid)
+        if task is None:
             return
-        self.editing_task_index = idx
-        task = self.tasks[idx]
+        self.editing_task_id = tid
 
         self._clear_inputs()
         self.subject_entry.insert(0, task.get("subject", ""))
@@ -843,62 +3129,87 @@ class HomeworkPlanner:
         self.category_var.set(task.get("category", ""))
         self.priority_var.set(task.get("priority", "Medium"))
         self.notes_entry.insert(0, task.get("notes", ""))
+        if task_estimate(task) is not None:
+            self.estimate_entry.insert(0, f"{task_estimate(task):g}")
 
         self.add_save_button.config(text="Save Changes")
         self.cancel_edit_button.pack(side="left", expand=True, fill="x", padx=5)
         self._toggle_buttons_state("disabled")
-        self.tree.config(selectmode="none")
+        self.table.set_selectmode("none")
 
     def _cancel_edit_mode(self):
-        self.editing_task_index = None
+        self.editing_task_id = None
         self._clear_inputs()
         self.add_save_button.config(text="Add Task")
         self.cancel_edit_button.pack_forget()
         self._toggle_buttons_state("normal")
-        self.tree.config(selectmode="browse")
+        self.table.set_selectmode("extended")
 
     def _delete_task(self):
-        tid = self._get_selected_task_id()
-        if not tid:
+        ids = self._get_selected_task_ids()
+        if not ids:
             return
-        idx = self._find_task_index_by_id(tid)
-        if idx is not None:
-            if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?", parent=self.root):
-                self.tasks.pop(idx)
-                save_tasks(self.tasks)
-                self.filtered_tasks = list(self.tasks)
-                self.refresh_table()
+        prompt = ("Are you sure you want to delete this task?" if len(ids) == 1
+                  else f"Are you sure you want to delete these {len(ids)} tasks?")
+        if messagebox.askyesno("Confirm Delete", prompt, parent=self.root):
+            self.history.remove_many(ids, "Delete")
+            self._update_undo_buttons()
+
+    def _set_field(self, field, value):
+        """Set one field on every selected task with a single store update."""
+        ids = self._get_selected_task_ids()
+        changes = {tid: {field: value} for tid in ids if self.store.get(tid).get(field) != value}
+        if changes:
+            self.history.update_many(changes, f"Set {field.title()}")
+            self._update_undo_buttons()
+
+    # ---------- undo / redo ----------
+    def _undo(self, event=None):
+        if event is not None and isinstance(event.widget, (tk.Entry, ttk.Entry, tk.Spinbox)):
+            return None  # Ctrl+Z while typing stays with the text field
+        if self.history.undo() is not None:
+            self._after_history_step()
+        return "break"
+
+    def _redo(self, event=None):
+        if event is not None and isinstance(event.widget, (tk.Entry, ttk.Entry, tk.Spinbox)):
+            return None
+        if self.history.redo() is not None:
+            self._after_history_step()
+        return "break"
+
+    def _after_history_step(self):
+        if self.editing_task_id is not None and self.store.get(self.editing_task_id) is None:
+            self._cancel_edit_mode()
+        self._update_undo_buttons()
+
+    def _update_undo_buttons(self):
+        undo, redo = self.history.undo_steps, self.history.redo_steps
+        self.undo_button.config(text=f"↶ Undo {undo[-1][0]}" if undo else "↶ Undo",
+                                state="normal" if undo else "disabled")
+        self.redo_button.config(text=f"↷ Redo {redo[-1][0]}" if redo else "↷ Redo",
+                                state="normal" if redo else "disabled")
+
+    def _set_status(self, status):
+        self._set_field("status", status)
 
     def _mark_done(self):
-        tid = self._get_selected_task_id()
-        if not tid:
-            return
-        idx = self._find_task_index_by_id(tid)
-        if idx is not None:
-            self.tasks[idx]["status"] = "Done"
-            save_tasks(self.tasks)
-            self.refresh_table()
+        self._set_status("Done")
 
     def _mark_not_done(self):
-        tid = self._get_selected_task_id()
-        if not tid:
-            return
-        idx = self._find_task_index_by_id(tid)
-        if idx is not None:
-            self.tasks[idx]["status"] = "Not Done"
-            save_tasks(self.tasks)
-            self.refresh_table()
+        self._set_status("Not Done")
 
     def _list_done_tasks(self):
-        TaskListWindow(self.root, self.tasks, "Done", self.theme)
+        TaskListWindow(self.root, self.store, self.store.tasks_with_status("Done"), "Done", self.theme)
 
     def _list_not_done_tasks(self):
-        TaskListWindow(self.root, self.tasks, "Not Done", self.theme)
+        TaskListWindow(self.root, self.store, self.store.tasks_with_status("Not Done"), "Not Done", self.theme)
 
     def _clear_inputs(self):
         self.subject_entry.delete(0, tk.END)
         self.title_entry.delete(0, tk.END)
         self.notes_entry.delete(0, tk.END)
+        self.estimate_entry.delete(0, tk.END)
         
         # Reset date spinboxes to current date
         today = datetime.now()
@@ -923,6 +3234,23 @@ def main(parent=None):
         return win
 
 
+def cli(argv=None):
+    """Command line: export without opening a window, otherwise start the planner."""
+    parser = argparse.ArgumentParser(description="Homework Planner")
+    parser.add_argument("--export", metavar="FILE", help="write tasks to FILE (.csv or .ics) and exit")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="export format (default: FILE's extension)")
+    parser.add_argument("--filter", default="", metavar="QUERY",
+                        help='only export tasks matching a search, e.g. "subject:math due:>=today"')
+    args = parser.parse_args(argv)
+    if args.export is None:
+        main()
+        return 0
+    try:
+        count = export_homework(args.export, args.format, filter=args.filter)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Export failed: {e}\n")
+    print(f"Exported {count} task(s) to {args.export}")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -307,7 +307,7 @@ class StudentAssistantApp(tk.Tk):
             self.pomodoro_win.lift()
 
     def _on_close_pomodoro(self):
-        self.pomodoro_win.destroy()
+        self.pomodoro_win._on_closing()
         self.pomodoro_win = None
 
 
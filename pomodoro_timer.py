@@ -4,14 +4,26 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import argparse
+import atexit
+import bisect
+import hashlib
 import os
 import json
+import math
 import random
+import sys
+import threading
+import time
 from datetime import datetime, timedelta, date
 
 # --- 2. Constants ---
 DATA_DIR = "data"
 DATA_FILE = os.path.join(DATA_DIR, "pomodoro_data.json")
+HISTORY_FILE = os.path.join(DATA_DIR, "pomodoro_history.jsonl")  # one line per ended session
+STATS_FILE = os.path.join(DATA_DIR, "pomodoro_stats.json")  # rollups of the history, updated per session
+HEATMAP_WEEKS = 12
+SAVE_DEBOUNCE_SECONDS = 0.5  # saves closer together than this are written once
 
 # UI Styling and Configuration
 FONT_FAMILY = "Comic Sans MS"
@@ -32,6 +44,23 @@ THEMES = {
     }
 }
 
+# Widget roles -> theme keys per option; THEME_STYLES resolves them for every theme once
+THEME_ROLES = {
+    "frame": {"bg": "BACKGROUND"},
+    "session_frame": {"bg": "SESSION_BG"},
+    "label": {"bg": "BACKGROUND", "fg": "FOREGROUND"},
+    "session": {"bg": "SESSION_BG", "fg": "FOREGROUND"},
+    "goal": {"bg": "BACKGROUND", "fg": "ACCENT"},
+    "menu": {"bg": "BACKGROUND", "fg": "FOREGROUND"},
+    "button": {"bg": "BUTTON", "fg": "FOREGROUND"},
+    "entry": {"bg": "BUTTON", "fg": "FOREGROUND", "insertbackground": "FOREGROUND"},
+    "listbox": {"bg": "BUTTON", "fg": "FOREGROUND", "selectbackground": "ACCENT"},
+    "scrollbar": {"bg": "BACKGROUND", "troughcolor": "BUTTON"},
+    **{name: {"bg": name.upper(), "fg": "FOREGROUND", "activebackground": f"{name.upper()}_ACTIVE"} for name in ("start", "pause", "reset")},
+}
+THEME_STYLES = {name: {role: {opt: theme[key] for opt, key in opts.items()} for role, opts in THEME_ROLES.items()} for name, theme in THEMES.items()}
+THEME_FADE_STEPS = 6  # frames the cross-fade overlay takes to clear after a theme toggle
+
 # Timer Modes & Default Durations (in seconds)
 MODES = {
     "POMODORO": "Pomodoro", "SHORT_BREAK": "Short Break",
@@ -43,10 +72,11 @@ DEFAULT_SETTINGS = {
 }
 DEFAULT_DATA = {
     "settings": DEFAULT_SETTINGS.copy(),
-    "tasks_data": {'tasks': [], 'descriptions': {}},
+    "tasks_data": {'tasks': [], 'next_id': 1},
     "daily_goal": {"date": "", "goal": ""}
 }
 PRIORITIES = ["High", "Medium", "Low"]
+TICK_SLACK_MS = 2  # wake this long after a second boundary so the shown second has already changed
 
 MOTIVATIONAL_QUOTES = [
     "The secret of getting ahead is getting started.", "The only way to do great work is to love what you do.",
@@ -60,7 +90,122 @@ try:
 except ImportError:
     SOUND_MODULE = None
 
-# --- 4. Custom Dialog Windows ---
+# --- 4. Data Persistence ---
+def load_app_data():
+    """
+    Loads data from the main data file, ensuring that the loaded data is
+    merged with defaults to handle forward compatibility if new settings
+    or keys are added in future versions of the application.
+    """
+    user_data = _load_json(DATA_FILE, {})
+
+    # Create the final configuration by starting with defaults and then
+    # overriding them with the user's saved data.
+    final_data = DEFAULT_DATA.copy()
+    final_data.update(user_data)
+
+    # For nested dictionaries like 'settings', we must merge them explicitly
+    # to ensure new default keys are added to the user's configuration.
+    final_data['settings'] = {**DEFAULT_SETTINGS, **final_data.get('settings', {})}
+
+    return final_data
+
+# Read and load JSON data from a file
+def _load_json(file_path, default=None):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f: return json.load(f)
+        except (json.JSONDecodeError, IOError): pass
+    return default if default is not None else {}
+
+# Copy dicts and lists (not their strings/numbers) so a background encode never sees later edits
+def _copy_containers(obj):
+    if isinstance(obj, dict): return {k: _copy_containers(v) for k, v in obj.items()}
+    if isinstance(obj, list): return [_copy_containers(v) for v in obj]
+    return obj
+
+class JsonWriter:
+    """
+    Write-behind saving of one JSON file on a background thread.
+    - save(data) only copies the containers of `data` and returns: the
+      caller never waits on encoding or the disk
+    - saves within SAVE_DEBOUNCE_SECONDS of each other are written once
+      (the latest data wins)
+    - the thread skips the write when the encoded bytes hash the same as
+      the file on disk, otherwise writes a temp file and renames it over
+      the target
+    - flush() waits until everything saved so far is on disk; close()
+      also stops the thread (and runs at exit if nothing called it before)
+    """
+    def __init__(self, path, indent=4, debounce=SAVE_DEBOUNCE_SECONDS):
+        self.path, self.indent, self.debounce = path, indent, debounce
+        self._cond = threading.Condition()
+        self._pending = None   # latest unsaved snapshot
+        self._due = 0.0        # time.monotonic() at which to write it
+        self._busy = False
+        self._closed = False
+        self._hash = None      # digest of the file as last read or written
+        self._thread = threading.Thread(target=self._run, name=f"writer-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def save(self, data):
+        snapshot = _copy_containers(data)
+        with self._cond:
+            self._pending = snapshot
+            self._due = time.monotonic() + self.debounce
+            self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            self._due = 0.0; self._cond.notify_all()
+            while self._pending is not None or self._busy: self._cond.wait()
+
+    def close(self):
+        if self._closed: return
+        atexit.unregister(self.close)
+        self.flush()
+        with self._cond: self._closed = True; self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            with open(self.path, 'rb') as f: self._hash = hashlib.sha1(f.read()).digest()
+        except OSError: pass
+        while True:
+            with self._cond:
+                while not self._closed and (self._pending is None or time.monotonic() < self._due):
+                    self._cond.wait(None if self._pending is None else max(0.0, self._due - time.monotonic()))
+                if self._pending is None: return  # closed with nothing left to write
+                data, self._pending, self._busy = self._pending, None, True
+            try: self._write(data)
+            finally:
+                with self._cond: self._busy = False; self._cond.notify_all()
+
+    def _write(self, data):
+        content = json.dumps(data, indent=self.indent).encode("utf-8")
+        digest = hashlib.sha1(content).digest()
+        if digest == self._hash: return
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, 'wb') as f: f.write(content); f.flush(); os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._hash = digest
+        except OSError as e:
+            print(f"Error saving data to {self.path}: {e}")
+
+def _format_focus(seconds):
+    h, m = divmod(int(seconds) // 60, 60)
+    return f"{h}h {m:02d}m" if h else f"{m}m"
+
+# Mix two "#RRGGBB" colors (t=0 gives a, t=1 gives b)
+def _blend(a, b, t):
+    ca, cb = (int(a[i:i + 2], 16) for i in (1, 3, 5)), (int(b[i:i + 2], 16) for i in (1, 3, 5))
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(ca, cb))
+
+# --- 5. Custom Dialog Windows ---
 class CustomDialog(tk.Toplevel):
     """Base class for custom styled dialogs."""
     def __init__(self, parent, title, theme, geometry="400x300"):
@@ -219,7 +364,390 @@ class DailyGoalDialog(CustomDialog):
     # Save goal on save button
     def _on_save(self): self.result = self.goal_entry.get().strip(); self.destroy()
 
-# --- 5. Main Application ---
+# Focus statistics: totals, streaks and a heatmap, all read from the history rollups
+class StatsWindow(CustomDialog):
+    def __init__(self, parent, history, theme):
+        super().__init__(parent, "Focus Stats", theme, "460x520")
+        bg, fg = self.theme["BACKGROUND"], self.theme["FOREGROUND"]
+        frame = tk.Frame(self, bg=bg, padx=15, pady=15); frame.pack(fill="both", expand=True)
+        today = date.today(); current, best = history.streak(today)
+        tk.Label(frame, text=f"🔥 Streak: {current} day{'s' if current != 1 else ''}   (best {best})", bg=bg, fg=self.theme["ACCENT"], font=(FONT_FAMILY, 14, "bold")).pack(anchor="w", pady=(0, 10))
+
+        summary = tk.Frame(frame, bg=bg); summary.pack(fill="x")
+        for row, (name, bucket) in enumerate((("Today", history.day(today)), ("This Week", history.week(today)), ("All Time", history.totals()))):
+            tk.Label(summary, text=name, bg=bg, fg=fg, font=(FONT_FAMILY, 11, "bold")).grid(row=row, column=0, sticky="w", pady=2)
+            text = f"{bucket.get('sessions', 0)} sessions · {_format_focus(bucket.get('focus', 0))} focused"
+            if bucket.get("skipped") or bucket.get("interrupted"): text += f" · {bucket.get('skipped', 0)} skipped · {bucket.get('interrupted', 0)} interrupted"
+            tk.Label(summary, text=text, bg=bg, fg=fg, font=(FONT_FAMILY, 10)).grid(row=row, column=1, sticky="w", padx=10)
+
+        tk.Label(frame, text=f"Last {HEATMAP_WEEKS} Weeks", bg=bg, fg=fg, font=(FONT_FAMILY, 11, "bold")).pack(anchor="w", pady=(15, 5))
+        self._draw_heatmap(frame, history, today)
+
+        tk.Label(frame, text="Top Tasks", bg=bg, fg=fg, font=(FONT_FAMILY, 11, "bold")).pack(anchor="w", pady=(15, 5))
+        tasks = history.top_tasks()
+        for task, bucket in tasks:
+            tk.Label(frame, text=f"• {task} — {bucket.get('sessions', 0)} sessions · {_format_focus(bucket.get('focus', 0))}", bg=bg, fg=fg, anchor="w", font=(FONT_FAMILY, 10)).pack(fill="x")
+        if not tasks: tk.Label(frame, text="Select a task before starting a Pomodoro to track it here.", bg=bg, fg=fg, font=(FONT_FAMILY, 10, "italic")).pack(anchor="w")
+        self._create_buttons(show_save=False)
+
+    # One square per day (columns are weeks, Monday on top), shaded by completed Pomodoros
+    def _draw_heatmap(self, parent, history, today, cell=16):
+        shades = [_blend(self.theme["BUTTON"], self.theme["ACCENT"], t) for t in (0, 0.3, 0.55, 0.8, 1)]
+        canvas = tk.Canvas(parent, width=30 + HEATMAP_WEEKS * cell, height=7 * cell + 2, bg=self.theme["BACKGROUND"], highlightthickness=0); canvas.pack(anchor="w")
+        for row, name in ((0, "Mon"), (2, "Wed"), (4, "Fri")):
+            canvas.create_text(0, row * cell + cell // 2, text=name, anchor="w", fill=self.theme["FOREGROUND"], font=(FONT_FAMILY, 8))
+        first = today - timedelta(days=today.weekday(), weeks=HEATMAP_WEEKS - 1)
+        for i in range((today - first).days + 1):
+            d = first + timedelta(days=i); sessions = history.day(d).get("sessions", 0)
+            x, y = 30 + (i // 7) * cell, (i % 7) * cell
+            canvas.create_rectangle(x, y, x + cell - 3, y + cell - 3, outline="", fill=shades[min(4, (sessions + 1) // 2)])
+
+# --- 6. Timer Engine ---
+class PomodoroEngine:
+    """
+    The timer without a window: current mode, countdown / stopwatch, completed
+    sessions and the long-break rotation, driven by the same settings keys as
+    DEFAULT_SETTINGS. `clock` returns seconds (time.monotonic by default; a
+    fake clock lets sessions be simulated instantly).
+    The engine never schedules anything itself: its owner calls tick() (the
+    window via after(), the CLI via sleep), which returns the seconds until
+    the shown time next changes, or None when the clock is stopped.
+    Callbacks registered with on(event, callback):
+        "tick"(shown)                   the shown whole seconds changed
+        "state"()                       started, paused, reset or switched mode
+        "complete"(mode, next_mode)     a countdown reached zero; the engine
+                                        switches to next_mode right after
+        "session"(mode, planned, actual, outcome)
+                                        a started countdown ended: "completed",
+                                        "skipped" (reset or switched away) or
+                                        "interrupted" (see interrupt()); times
+                                        in seconds. Stopwatch runs are not sessions.
+    """
+    EVENTS = ("tick", "state", "complete", "session")
+
+    def __init__(self, settings=None, clock=time.monotonic):
+        self.settings = settings if settings is not None else DEFAULT_SETTINGS.copy()
+        self.clock = clock
+        self.listeners = {event: [] for event in self.EVENTS}
+        self.mode = MODES["POMODORO"]
+        self.is_running = False
+        self.sessions_completed = 0
+        self.remaining = 0.0           # exact countdown seconds left while paused
+        self.deadline = None           # clock() at which the running countdown ends
+        self.stopwatch_elapsed = 0.0   # exact stopwatch seconds before the current run
+        self.stopwatch_started = None  # clock() when the current stopwatch run started
+        self.shown = 0                 # whole seconds on display
+        self.session_active = False    # a countdown has been started and not ended yet
+        self._reset_clock()
+
+    def on(self, event, callback): self.listeners[event].append(callback)
+
+    def _emit(self, event, *args):
+        for callback in list(self.listeners[event]): callback(*args)
+
+    def duration(self, mode):
+        if mode == MODES["STOPWATCH"]: return 0
+        mode_key = next(k for k, v in MODES.items() if v == mode).lower()
+        return self.settings.get(f"{mode_key}_duration", 0)
+
+    @property
+    def is_stopwatch(self): return self.mode == MODES["STOPWATCH"]
+
+    @property
+    def is_fresh(self):
+        """True until the current countdown has run at all (Start rather than Resume)."""
+        return self.remaining == self.duration(self.mode)
+
+    def _reset_clock(self):
+        self.is_running = False
+        self.deadline = self.stopwatch_started = None
+        self.stopwatch_elapsed = 0.0
+        self.remaining = float(self.duration(self.mode))
+        self.shown = self.duration(self.mode)
+
+    # Controls
+    def start(self):
+        if self.is_running: return
+        self.is_running = True
+        if self.is_stopwatch: self.stopwatch_started = self.clock()
+        else: self.deadline = self.clock() + self.remaining; self.session_active = True
+        self._emit("state")
+
+    def pause(self):
+        if not self.is_running: return
+        # keep the exact time so resuming does not lose or gain a fraction of a second
+        now = self.clock()
+        if self.is_stopwatch: self.stopwatch_elapsed += now - self.stopwatch_started
+        else: self.remaining = max(0.0, self.deadline - now)
+        self.is_running = False
+        self._emit("state")
+
+    def toggle(self): self.pause() if self.is_running else self.start()
+
+    def reset(self): self.switch_mode(self.mode, force_reset=True)
+
+    def switch_mode(self, mode, force_reset=False):
+        """Change mode (ignored while running unless force_reset). Returns True if switched."""
+        if self.is_running and not force_reset: return False
+        self._end_session("skipped")
+        self.mode = mode
+        self._reset_clock()
+        self._emit("state")
+        return True
+
+    def interrupt(self):
+        """Ends a session in progress as "interrupted" (call when the app closes)."""
+        self._end_session("interrupted")
+
+    def _end_session(self, outcome):
+        if not self.session_active: return
+        self.session_active = False
+        left = max(0.0, self.deadline - self.clock()) if self.is_running else self.remaining
+        planned = self.duration(self.mode)
+        self._emit("session", self.mode, planned, round(max(0.0, planned - left)), outcome)
+
+    def update_settings(self, new_settings):
+        self.settings.update(new_settings)
+        self.reset()
+
+    def tick(self):
+        """
+        Recompute the shown time from the clock (so late calls never make a
+        session run long) and handle completion. Returns the seconds until
+        the shown time changes next, or None if the clock is not running.
+        """
+        if not self.is_running: return None
+        now = self.clock()
+        if self.is_stopwatch:
+            elapsed = self.stopwatch_elapsed + now - self.stopwatch_started
+            shown = int(elapsed); wait = shown + 1 - elapsed
+        else:
+            remaining = self.deadline - now
+            if remaining <= 0:
+                self._complete()
+                return None
+            shown = math.ceil(remaining); wait = remaining - (shown - 1)
+        if shown != self.shown:
+            self.shown = shown; self._emit("tick", shown)
+        return wait
+
+    def _complete(self):
+        finished = self.mode
+        self.is_running = False; self.remaining = 0.0; self.shown = 0
+        self._emit("tick", 0)
+        self._end_session("completed")
+        next_mode = MODES["POMODORO"]
+        if finished == MODES["POMODORO"]:
+            self.sessions_completed += 1
+            interval = max(1, self.settings.get("long_break_interval", 4))
+            next_mode = MODES["LONG_BREAK"] if self.sessions_completed % interval == 0 else MODES["SHORT_BREAK"]
+        self._emit("complete", finished, next_mode)
+        self.switch_mode(next_mode, force_reset=True)
+
+    def format(self, seconds=None):
+        seconds = self.shown if seconds is None else seconds
+        if self.is_stopwatch:
+            h, rem = divmod(seconds, 3600); m, s = divmod(rem, 60); return f"{h:02d}:{m:02d}:{s:02d}"
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+# --- 7. Session History ---
+class SessionHistory:
+    """
+    Every ended session is appended to HISTORY_FILE (one JSON object per
+    line) and folded into running totals kept in STATS_FILE:
+        days / weeks: "YYYY-MM-DD" / "YYYY-Www" -> counts and focus seconds
+        tasks:        task -> completed Pomodoros and focus seconds
+        totals:       the same counts over all time
+        streak:       last day with a completed Pomodoro, current and best run of days
+        offset:       bytes of HISTORY_FILE already folded in
+    So showing stats never re-reads the history. If STATS_FILE is missing or
+    behind (e.g. the app crashed between the two writes), only the lines
+    after `offset` are folded in on start-up.
+    """
+    OUTCOMES = ("completed", "skipped", "interrupted")
+
+    def __init__(self, history_path=HISTORY_FILE, stats_path=STATS_FILE):
+        self.history_path = history_path
+        self.stats = _load_json(stats_path, {})
+        self.stats_writer = JsonWriter(stats_path, indent=None)
+        if not self.stats or self.stats.get("offset", 0) > self._history_size(): self.stats = self._empty_stats()
+        if self.stats["offset"] < self._history_size(): self._catch_up(); self.stats_writer.save(self.stats)
+
+    @staticmethod
+    def _empty_stats():
+        return {"days": {}, "weeks": {}, "tasks": {}, "totals": {},
+                "streak": {"last_day": "", "current": 0, "best": 0}, "offset": 0}
+
+    def _history_size(self):
+        try: return os.path.getsize(self.history_path)
+        except OSError: return 0
+
+    def _catch_up(self):
+        with open(self.history_path, 'r+b') as f:
+            f.seek(self.stats["offset"])
+            for line in f:
+                if not line.endswith(b"\n"): break
+                try: self._fold(json.loads(line))
+                except (ValueError, KeyError, TypeError): pass
+                self.stats["offset"] += len(line)
+            # drop a half-written last line so the next record starts on a line of its own
+            f.truncate(self.stats["offset"])
+
+    def record(self, mode, planned, actual, outcome, task=None, when=None):
+        """Appends one session and updates the rollups (no re-scan)."""
+        entry = {"end": (when or datetime.now()).isoformat(timespec="seconds"), "mode": mode,
+                 "planned": planned, "actual": actual, "outcome": outcome}
+        if task: entry["task"] = task
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+        try:
+            with open(self.history_path, 'ab') as f: f.write(line)
+        except OSError as e:
+            print(f"Error saving session history: {e}"); return
+        self._fold(entry)
+        self.stats["offset"] += len(line)
+        self.stats_writer.save(self.stats)
+
+    # Only Pomodoros count towards the stats; breaks are kept in the history file alone
+    def _fold(self, entry):
+        if entry["mode"] != MODES["POMODORO"] or entry["outcome"] not in self.OUTCOMES: return
+        day = date.fromisoformat(entry["end"][:10])
+        iso_year, iso_week, _ = day.isocalendar()
+        counter = "sessions" if entry["outcome"] == "completed" else entry["outcome"]
+        buckets = [self.stats["days"].setdefault(day.isoformat(), {}),
+                   self.stats["weeks"].setdefault(f"{iso_year}-W{iso_week:02d}", {}), self.stats["totals"]]
+        if entry.get("task"): buckets.append(self.stats["tasks"].setdefault(entry["task"], {}))
+        for bucket in buckets:
+            bucket[counter] = bucket.get(counter, 0) + 1
+            bucket["focus"] = bucket.get("focus", 0) + entry["actual"]
+        if counter == "sessions": self._extend_streak(day)
+
+    def _extend_streak(self, day):
+        streak = self.stats["streak"]
+        last = date.fromisoformat(streak["last_day"]) if streak["last_day"] else None
+        if last is not None and day <= last: return
+        streak["current"] = streak["current"] + 1 if last == day - timedelta(days=1) else 1
+        streak["best"] = max(streak["best"], streak["current"]); streak["last_day"] = day.isoformat()
+
+    def close(self): self.stats_writer.close()
+
+    # Lookups: all O(1) (or O(tasks) for top_tasks), independent of the history length
+    def day(self, d): return self.stats["days"].get(d.isoformat(), {})
+
+    def week(self, d):
+        iso_year, iso_week, _ = d.isocalendar()
+        return self.stats["weeks"].get(f"{iso_year}-W{iso_week:02d}", {})
+
+    def totals(self): return self.stats["totals"]
+
+    def streak(self, today=None):
+        """(current, best) days in a row with a completed Pomodoro; a run still counts until today ends."""
+        today = today or date.today(); streak = self.stats["streak"]
+        alive = streak["last_day"] and date.fromisoformat(streak["last_day"]) >= today - timedelta(days=1)
+        return (streak["current"] if alive else 0), streak["best"]
+
+    def top_tasks(self, n=5):
+        return sorted(self.stats["tasks"].items(), key=lambda kv: -kv[1].get("focus", 0))[:n]
+
+# --- 8. Task List ---
+class TaskList:
+    """
+    The task list model. Each task is {"id", "text", "priority", "description"}
+    and `keys` holds every task's (priority rank, id) in sorted order: ids
+    only grow, so tasks of equal priority stay in the order they were added
+    and a task's row is one bisect away. Files saved before tasks had ids
+    (display strings like "[H] text" plus descriptions keyed by them) are
+    converted on load.
+    """
+    def __init__(self, task_data=None):
+        task_data = task_data or {}
+        self.tasks, self.keys = {}, []
+        self.next_id = task_data.get("next_id", 1)
+        descriptions = task_data.get("descriptions", {})
+        for task in task_data.get("tasks", []):
+            if "id" not in task:
+                text = task.get("text", "")
+                priority = next((p for p in PRIORITIES if text.startswith(f"[{p[0]}] ")), None)
+                task = {"id": self.next_id, "text": text[4:] if priority else text,
+                        "priority": priority or PRIORITIES[1], "description": descriptions.get(text, "")}
+            self._insert(dict(task))
+
+    def _key(self, tid): return (PRIORITIES.index(self.tasks[tid]["priority"]), tid)
+
+    def _insert(self, task):
+        self.tasks[task["id"]] = task
+        self.next_id = max(self.next_id, task["id"] + 1)
+        key = self._key(task["id"]); index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        return index
+
+    def __len__(self): return len(self.keys)
+
+    def __getitem__(self, tid): return self.tasks[tid]
+
+    def index_of(self, tid): return bisect.bisect_left(self.keys, self._key(tid))
+
+    def id_at(self, index): return self.keys[index][1]
+
+    def display(self, tid):
+        task = self.tasks[tid]
+        return f"[{task['priority'][0]}] {task['text']}"
+
+    # Each edit returns the row(s) it touched so a view can update just those
+    def add(self, text, priority, description=""):
+        tid = self.next_id
+        return tid, self._insert({"id": tid, "text": text, "priority": priority, "description": description})
+
+    def remove(self, tid):
+        index = self.index_of(tid)
+        del self.keys[index]; del self.tasks[tid]
+        return index
+
+    def set_priority(self, tid, priority):
+        old = self.index_of(tid); del self.keys[old]
+        task = self.tasks.pop(tid); task["priority"] = priority
+        return old, self._insert(task)
+
+    def clear(self): self.tasks.clear(); self.keys.clear()
+
+    def to_data(self): return {"tasks": [self.tasks[tid] for _, tid in self.keys], "next_id": self.next_id}
+
+# Listbox view of a TaskList: add, delete and priority changes touch only their own rows
+class TaskListbox(tk.Listbox):
+    def __init__(self, parent, tasks, theme, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.tasks, self.theme = tasks, theme
+        if len(tasks): self.insert(tk.END, *(tasks.display(tid) for _, tid in tasks.keys))
+        self.recolor(theme)
+
+    def _color(self, tid): return self.theme[f"{self.tasks[tid]['priority'].upper()}_PRIORITY"]
+
+    def _show(self, tid, index):
+        self.insert(index, self.tasks.display(tid)); self.itemconfig(index, fg=self._color(tid))
+
+    def add(self, text, priority):
+        tid, index = self.tasks.add(text, priority); self._show(tid, index)
+        return tid
+
+    def remove(self, tid): self.delete(self.tasks.remove(tid))
+
+    def set_priority(self, tid, priority):
+        old, new = self.tasks.set_priority(tid, priority)
+        self.delete(old); self._show(tid, new)
+        return new
+
+    def clear(self): self.tasks.clear(); self.delete(0, tk.END)
+
+    def selected_id(self):
+        selection = self.curselection()
+        return self.tasks.id_at(selection[0]) if selection else None
+
+    # Theme changes alter every priority color, so this one pass is the only full walk
+    def recolor(self, theme):
+        self.theme = theme
+        for index, (_, tid) in enumerate(self.tasks.keys): self.itemconfig(index, fg=self._color(tid))
+
+# --- 9. Main Application ---
 class PomodoroTimer(tk.Toplevel):
     def __init__(self, master=None):
         super().__init__(master)
@@ -232,32 +760,38 @@ class PomodoroTimer(tk.Toplevel):
                 print("Pygame mixer could not be initialized.")
                 
         os.makedirs(DATA_DIR, exist_ok=True)
-        self.app_data = self._load_data()
+        self.app_data = load_app_data()
+        self.writer = JsonWriter(DATA_FILE)
         self.settings = self.app_data['settings']
-        self.task_data = self.app_data['tasks_data']
-        self.task_descriptions = self.task_data.get('descriptions', {})
+        self.tasks = TaskList(self.app_data['tasks_data'])
         
         self.theme_name = self.settings.get("theme", "dark")
         self.theme = THEMES[self.theme_name]
 
-        self.current_mode = MODES["POMODORO"]
-        self.time_left = self.settings["pomodoro_duration"]
-        self.sessions_completed = 0
-        self.is_running = False
+        # all timer state lives in the engine; this window only shows it
+        self.engine = PomodoroEngine(self.settings)
+        self.engine.on("tick", lambda shown: self._update_timer_display())
+        self.engine.on("state", self._on_engine_state)
+        self.engine.on("complete", self._handle_timer_completion)
+        self.engine.on("session", self._record_session)
+        self.history = SessionHistory()
+        self.engine.sessions_completed = self.history.day(date.today()).get("sessions", 0)  # today's rotation carries on
+        self.session_task = None  # task selected when the current session started
         self.timer_id = None
-        self.stopwatch_time = 0
         self.sound_channel = None
         self.mode_buttons = {}
-        self.all_widgets = []
+        self.themed_widgets = []  # (widget, THEME_ROLES key), restyled in one pass by _apply_theme
+        self._fade_overlay = None
         self.clicked_task_index = None
 
         self.title("Study Pomodoro Timer"); self.geometry("500x800")
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
+        self.bind("<Destroy>", self._on_destroy)
 
         self.grid_rowconfigure(0, weight=1); self.grid_columnconfigure(0, weight=1)
         self.main_frame = tk.Frame(self); self.main_frame.grid(row=0, column=0)
         self.main_frame.bind("<Button-1>", self._clear_focus)
-        self.all_widgets.append(self.main_frame)
+        self._theme_widget(self.main_frame, "frame")
 
         self._setup_ui()
         self._bind_shortcuts()
@@ -266,20 +800,21 @@ class PomodoroTimer(tk.Toplevel):
     # Load data from JSON file or initialize defaults
     def _setup_ui(self):
         self._create_menu()
-        self.goal_label = self._create_label("Click to set your daily goal!", font=(FONT_FAMILY, 12, "italic"), fg_theme_key="ACCENT", wraplength=480, pady=(0, 5))
+        self.goal_label = self._create_label("Click to set your daily goal!", font=(FONT_FAMILY, 12, "italic"), role="goal", wraplength=480, pady=(0, 5))
         self.goal_label.bind("<Button-1>", lambda e: self.set_daily_goal())
         
         self.session_frame = tk.Frame(self.main_frame, relief='groove', borderwidth=2)
         self.session_frame.pack(pady=5, fill='x')
-        self.all_widgets.append(self.session_frame)
+        self._theme_widget(self.session_frame, "session_frame")
         self.session_frame.bind("<Button-1>", self._clear_focus) 
 
-        self.session_label = self._create_label("Sessions Completed: 0", parent=self.session_frame, font=(FONT_FAMILY, 12, "bold"), bg_theme_key="SESSION_BG", pady=10)
+        self.session_label = self._create_label(f"Sessions Completed: {self.engine.sessions_completed}", parent=self.session_frame, font=(FONT_FAMILY, 12, "bold"), role="session", pady=10)
         self.session_label.bind("<Button-1>", self._clear_focus) 
         
         self._create_mode_buttons()
         
-        self.timer_label = self._create_label(self._format_time(self.time_left), font=(FONT_FAMILY, 60, "bold"), pady=20)
+        self._shown_time = self.engine.format()
+        self.timer_label = self._create_label(self._shown_time, font=(FONT_FAMILY, 60, "bold"), pady=20)
         self.timer_label.bind("<Button-1>", self._clear_focus) 
         
         self.quote_label = self._create_label("Let's get started!", font=(FONT_FAMILY, 11, "italic"), wraplength=480, pady=(0, 10))
@@ -287,17 +822,18 @@ class PomodoroTimer(tk.Toplevel):
 
         self._create_control_buttons()
         self._create_task_manager()
-        self._apply_theme(animated=False)
-        self._load_tasks_to_listbox()
+        self._theme_widget(self, "frame"); self._theme_widget(self.menubar, "menu"); self._theme_widget(self.settings_menu, "menu")
+        self._apply_theme()
         
-    def _create_label(self, text, parent=None, **kwargs):
+    def _create_label(self, text, parent=None, role="label", **kwargs):
         parent = parent or self.main_frame
         pack_opts = {k: kwargs.pop(k) for k in ['pady', 'padx', 'fill', 'expand', 'side'] if k in kwargs}
-        kwargs['bg'] = self.theme[kwargs.pop('bg_theme_key', 'BACKGROUND')]
-        kwargs['fg'] = self.theme[kwargs.pop('fg_theme_key', 'FOREGROUND')]
-        label = tk.Label(parent, text=text, **kwargs); label.pack(**pack_opts)
-        self.all_widgets.append(label)
-        return label
+        label = tk.Label(parent, text=text, **kwargs, **THEME_STYLES[self.theme_name][role]); label.pack(**pack_opts)
+        return self._theme_widget(label, role)
+
+    def _theme_widget(self, widget, role):
+        self.themed_widgets.append((widget, role))
+        return widget
     
     def _create_menu(self):
         self.menubar = tk.Menu(self, tearoff=0); self.config(menu=self.menubar)
@@ -306,12 +842,13 @@ class PomodoroTimer(tk.Toplevel):
         self.settings_menu.add_command(label="Configure Timers", command=self.open_settings_window)
         self.settings_menu.add_separator()
         self.settings_menu.add_command(label="Reset Defaults", command=self.reset_settings)
+        self.menubar.add_command(label="📊 Stats", command=lambda: StatsWindow(self, self.history, self.theme))
         self.menubar.add_command(label="☀️ Light /🌙 Dark ", command=self.toggle_theme)
         self.menubar.add_command(label="Exit", command=self._on_closing)
 
     # Mode selection buttons (Pomodoro, Short Break, Long Break, Stopwatch)
     def _create_mode_buttons(self):
-        self.mode_frame = tk.Frame(self.main_frame); self.mode_frame.pack(pady=10); self.all_widgets.append(self.mode_frame)
+        self.mode_frame = tk.Frame(self.main_frame); self.mode_frame.pack(pady=10); self._theme_widget(self.mode_frame, "frame")
         for mode in MODES.values():
             btn = tk.Button(self.mode_frame, text=mode, relief="flat", font=(FONT_FAMILY, 10), command=lambda m=mode: self.switch_mode(m))
             btn.pack(side="left", padx=5, ipadx=5, ipady=2)
@@ -319,35 +856,35 @@ class PomodoroTimer(tk.Toplevel):
 
     # Control buttons for start, pause, and reset functions
     def _create_control_buttons(self):
-        self.control_frame = tk.Frame(self.main_frame); self.control_frame.pack(pady=10); self.all_widgets.append(self.control_frame)
+        self.control_frame = tk.Frame(self.main_frame); self.control_frame.pack(pady=10); self._theme_widget(self.control_frame, "frame")
         configs = {"start": self.start_timer, "pause": self.pause_or_stop_timer, "reset": self.reset_timer}
         self.control_buttons = {}
         for name, command in configs.items():
             btn = tk.Button(self.control_frame, text=name.capitalize(), relief="flat", font=(FONT_FAMILY, 16, "bold"), command=command)
             btn.pack(side="left", padx=10)
-            self.control_buttons[name] = btn
+            self.control_buttons[name] = self._theme_widget(btn, name)
         self.control_buttons["pause"].config(state="disabled")
 
     # Task manager with add, delete, edit, and priority features 
     def _create_task_manager(self):
-        self.task_frame = tk.Frame(self.main_frame); self.task_frame.pack(pady=15, fill="both", expand=True); self.all_widgets.append(self.task_frame)
+        self.task_frame = tk.Frame(self.main_frame); self.task_frame.pack(pady=15, fill="both", expand=True); self._theme_widget(self.task_frame, "frame")
         self._create_label("Tasks", parent=self.task_frame, font=(FONT_FAMILY, 14, "bold"))
-        input_frame = tk.Frame(self.task_frame); input_frame.pack(fill="x", pady=5); self.all_widgets.append(input_frame)
+        input_frame = tk.Frame(self.task_frame); input_frame.pack(fill="x", pady=5); self._theme_widget(input_frame, "frame")
         self.priority_var = tk.StringVar(value=PRIORITIES[1])
-        self.priority_menu = tk.OptionMenu(input_frame, self.priority_var, *PRIORITIES); self.priority_menu.pack(side="left", padx=(0, 5)); self.all_widgets.append(self.priority_menu)
-        self.task_entry = tk.Entry(input_frame, fg="grey", relief="flat", font=(FONT_FAMILY, 12)); self.task_entry.pack(side="left", fill="x", expand=True); self.all_widgets.append(self.task_entry)
+        self.priority_menu = tk.OptionMenu(input_frame, self.priority_var, *PRIORITIES); self.priority_menu.pack(side="left", padx=(0, 5)); self._theme_widget(self.priority_menu, "button")
+        self.task_entry = tk.Entry(input_frame, fg="grey", relief="flat", font=(FONT_FAMILY, 12)); self.task_entry.pack(side="left", fill="x", expand=True); self._theme_widget(self.task_entry, "entry")
         self.task_entry.insert(0, "Enter task here...")
         self.task_entry.bind("<FocusIn>", lambda e: self.task_entry.get() == "Enter task here..." and (self.task_entry.delete(0, tk.END), self.task_entry.config(fg=self.theme["FOREGROUND"])))
         self.task_entry.bind("<FocusOut>", lambda e: not self.task_entry.get() and (self.task_entry.config(fg="grey"), self.task_entry.insert(0, "Enter task here...")))
-        btn_frame = tk.Frame(self.task_frame); btn_frame.pack(pady=5, fill="x"); self.all_widgets.append(btn_frame)
-        self.add_task_btn = tk.Button(btn_frame, text="Add Task", command=self.add_task, relief="flat"); self.add_task_btn.pack(side="left", padx=5); self.all_widgets.append(self.add_task_btn)
-        self.del_task_btn = tk.Button(btn_frame, text="Delete Selected", command=self.delete_task, relief="flat"); self.del_task_btn.pack(side="left", padx=5); self.all_widgets.append(self.del_task_btn)
-        self.del_all_btn = tk.Button(btn_frame, text="Delete All", command=self.delete_all_tasks, relief="flat"); self.del_all_btn.pack(side="left", padx=5); self.all_widgets.append(self.del_all_btn)
-        list_frame = tk.Frame(self.task_frame); list_frame.pack(fill="both", expand=True); self.all_widgets.append(list_frame)
-        self.task_listbox = tk.Listbox(list_frame, relief="flat", font=(FONT_FAMILY, 12), height=8); self.task_listbox.pack(side="left", fill="both", expand=True); self.all_widgets.append(self.task_listbox)
+        btn_frame = tk.Frame(self.task_frame); btn_frame.pack(pady=5, fill="x"); self._theme_widget(btn_frame, "frame")
+        self.add_task_btn = tk.Button(btn_frame, text="Add Task", command=self.add_task, relief="flat"); self.add_task_btn.pack(side="left", padx=5); self._theme_widget(self.add_task_btn, "button")
+        self.del_task_btn = tk.Button(btn_frame, text="Delete Selected", command=self.delete_task, relief="flat"); self.del_task_btn.pack(side="left", padx=5); self._theme_widget(self.del_task_btn, "button")
+        self.del_all_btn = tk.Button(btn_frame, text="Delete All", command=self.delete_all_tasks, relief="flat"); self.del_all_btn.pack(side="left", padx=5); self._theme_widget(self.del_all_btn, "button")
+        list_frame = tk.Frame(self.task_frame); list_frame.pack(fill="both", expand=True); self._theme_widget(list_frame, "frame")
+        self.task_listbox = TaskListbox(list_frame, self.tasks, self.theme, relief="flat", font=(FONT_FAMILY, 12), height=8); self.task_listbox.pack(side="left", fill="both", expand=True); self._theme_widget(self.task_listbox, "listbox")
         self.task_listbox.bind("<Double-Button-1>", self.edit_task_description)
         self.task_listbox.bind("<Button-3>", self._show_priority_menu)
-        self.scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.task_listbox.yview); self.scrollbar.pack(side="right", fill="y"); self.all_widgets.append(self.scrollbar)
+        self.scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.task_listbox.yview); self.scrollbar.pack(side="right", fill="y"); self._theme_widget(self.scrollbar, "scrollbar")
         self.task_listbox.config(yscrollcommand=self.scrollbar.set)
 
     # Shortcut key bindings for quick access to functions
@@ -369,150 +906,99 @@ class PomodoroTimer(tk.Toplevel):
         
     # Toggle between light and dark themes
     def toggle_theme(self):
+        old_bg = self.theme["BACKGROUND"]
         self.theme_name = "light" if self.theme_name == "dark" else "dark"
         self.theme = THEMES[self.theme_name]
         self.settings['theme'] = self.theme_name
-        self._apply_theme(animated=True)
-
-    def _apply_theme(self, animated=False, widget_index=0):
-        if not animated:
-            for widget in self.all_widgets:
-                self._configure_widget_theme(widget)
-        elif widget_index < len(self.all_widgets):
-            self._configure_widget_theme(self.all_widgets[widget_index])
-            self.after(15, self._apply_theme, True, widget_index + 1)
-            return
-
-        self._configure_special_widgets()
-        self._recolor_tasks()
-
-    # Configure individual widget colors based on type and theme
-    def _configure_widget_theme(self, widget):
-        widget_class = widget.winfo_class()
-        bg, fg = self.theme["BACKGROUND"], self.theme["FOREGROUND"]
-
-        if widget in [self.session_frame, self.session_label]: bg = self.theme["SESSION_BG"]
-        elif widget == self.goal_label: fg = self.theme["ACCENT"]
-        elif widget_class == "Entry":
-            bg = self.theme["BUTTON"]
-            fg = "grey" if widget.get() == "Enter task here..." else self.theme["FOREGROUND"]
-            widget.config(insertbackground=self.theme["FOREGROUND"])
-        elif widget_class in ["Button", "Menubutton", "TMenubutton"]: bg = self.theme["BUTTON"]
-        elif widget_class == "Listbox":
-            bg = self.theme["BUTTON"]
-            widget.config(selectbackground=self.theme["ACCENT"])
-        elif widget_class == "Scrollbar": widget.config(troughcolor=self.theme["BUTTON"])
-        
-        try:
-            widget.config(bg=bg)
-        except tk.TclError:
-            pass
-        try:
-            widget.config(fg=fg)
-        except tk.TclError:
-            pass
-
-    # Recolor tasks based on their priority
-    def _configure_special_widgets(self):
-        self.config(bg=self.theme["BACKGROUND"])
-        self.menubar.config(bg=self.theme["BACKGROUND"], fg=self.theme["FOREGROUND"])
-        self.settings_menu.config(bg=self.theme["BACKGROUND"], fg=self.theme["FOREGROUND"])
+        self._apply_theme()
+        self._cross_fade(old_bg, self.theme["BACKGROUND"])
+
+    # Restyle every widget from the precomputed table: one configure call each, all in this one callback
+    def _apply_theme(self):
+        styles = THEME_STYLES[self.theme_name]
+        for widget, role in self.themed_widgets: widget.configure(**styles[role])
+        if self.task_entry.get() == "Enter task here...": self.task_entry.config(fg="grey")
         self._update_mode_buttons_display()
-        for name, btn in self.control_buttons.items():
-            btn.config(bg=self.theme[name.upper()], fg=self.theme["FOREGROUND"], activebackground=self.theme[f"{name.upper()}_ACTIVE"])
+        self.task_listbox.recolor(self.theme)
+
+    # Cover the window with the old background and fade it into the new one; the widgets underneath are already restyled
+    def _cross_fade(self, old_bg, new_bg, step=0):
+        if step == 0:
+            if self._fade_overlay: self._fade_overlay.destroy()
+            self._fade_overlay = tk.Frame(self, bg=old_bg); self._fade_overlay.place(x=0, y=0, relwidth=1, relheight=1)
+        elif step < THEME_FADE_STEPS:
+            self._fade_overlay.config(bg=_blend(old_bg, new_bg, step / THEME_FADE_STEPS))
+        else:
+            self._fade_overlay.destroy(); self._fade_overlay = None
+            return
+        overlay = self._fade_overlay
+        self.after(16, lambda: overlay is self._fade_overlay and self._cross_fade(old_bg, new_bg, step + 1))
 
     def start_timer(self):
-        if not self.is_running:
-            self.is_running = True
-            if self.current_mode == MODES["STOPWATCH"]: self.run_stopwatch()
-            else:
-                if self.current_mode == MODES["POMODORO"]: self.quote_label.config(text=random.choice(MOTIVATIONAL_QUOTES))
-                self.run_countdown()
-            self._update_button_states()
-
-    def pause_or_stop_timer(self):
-        if self.is_running:
-            self.is_running = False; self._update_button_states()
-            if self.timer_id: self.after_cancel(self.timer_id)
-
-    def reset_timer(self):
-        if self.timer_id: self.after_cancel(self.timer_id)
-        self.is_running = False
-        if self.current_mode == MODES["STOPWATCH"]: self.stopwatch_time = 0
-        self.switch_mode(self.current_mode, force_reset=True)
+        if not self.engine.is_running:
+            if self.engine.mode == MODES["POMODORO"]: self.quote_label.config(text=random.choice(MOTIVATIONAL_QUOTES))
+            if not self.engine.session_active: self.session_task = self._selected_task_text()
+            self.engine.start(); self._run_clock()
 
-    def toggle_start_pause(self):
-        if self.is_running: self.pause_or_stop_timer()
-        else: self.start_timer()
+    def pause_or_stop_timer(self): self.engine.pause()
 
-    def run_countdown(self):
-        if self.is_running and self.time_left > 0:
-            self.time_left -= 1; self._update_timer_display()
-            self.timer_id = self.after(1000, self.run_countdown)
-        elif self.time_left <= 0:
-            self.is_running = False; self._handle_timer_completion()
+    def reset_timer(self): self.engine.reset()
 
-    def run_stopwatch(self):
-        if self.is_running:
-            self.stopwatch_time += 1; self._update_timer_display()
-            self.timer_id = self.after(1000, self.run_stopwatch)
+    def toggle_start_pause(self): self.pause_or_stop_timer() if self.engine.is_running else self.start_timer()
 
     # Switch between timer modes and reset if necessary
-    def switch_mode(self, mode, force_reset=False):
-        if self.is_running and not force_reset: return
-        self.is_running = False
-        if self.timer_id: self.after_cancel(self.timer_id)
-        self.current_mode = mode
-        if mode == MODES["STOPWATCH"]: self.time_left = self.stopwatch_time = 0
-        else:
-            mode_key = next(k for k, v in MODES.items() if v == mode).lower()
-            self.time_left = self.settings.get(f"{mode_key}_duration", 0)
+    def switch_mode(self, mode, force_reset=False): self.engine.switch_mode(mode, force_reset)
+
+    # Let the engine catch up with the clock, then wake just after the shown second changes
+    def _run_clock(self):
+        self.timer_id = None
+        wait = self.engine.tick()
+        if wait is not None: self.timer_id = self.after(max(1, int(wait * 1000) + TICK_SLACK_MS), self._run_clock)
+
+    def _on_engine_state(self):
+        if not self.engine.is_running and self.timer_id: self.after_cancel(self.timer_id); self.timer_id = None
         self._update_timer_display(); self._update_button_states(); self._update_mode_buttons_display()
 
-    # Handle timer completion: play sound, show message, switch modes
-    def _handle_timer_completion(self):
+    def _record_session(self, mode, planned, actual, outcome):
+        self.history.record(mode, planned, actual, outcome, task=self.session_task)
+
+    def _selected_task_text(self):
+        tid = self.task_listbox.selected_id()
+        return self.tasks[tid]["text"] if tid is not None else None
+
+    # Handle timer completion: play sound, show message (the engine then switches modes)
+    def _handle_timer_completion(self, mode, next_mode):
         self._play_sound()
-        messagebox.showinfo("Timer Finished!", f"{self.current_mode} session is complete!")
+        messagebox.showinfo("Timer Finished!", f"{mode} session is complete!")
         if self.sound_channel:
             self.sound_channel.stop()
             self.sound_channel = None
-
-        next_mode = MODES["POMODORO"]
-        if self.current_mode == MODES["POMODORO"]:
-            self.sessions_completed += 1
-            self.session_label.config(text=f"Sessions Completed: {self.sessions_completed}")
-            next_mode = MODES["LONG_BREAK"] if self.sessions_completed % self.settings["long_break_interval"] == 0 else MODES["SHORT_BREAK"]
-        self.switch_mode(next_mode, force_reset=True)
+        self.session_label.config(text=f"Sessions Completed: {self.engine.sessions_completed}")
 
     def add_task(self):
         task_text = self.task_entry.get().strip()
         if task_text and task_text != "Enter task here...":
-            priority = self.priority_var.get()
-            self.task_listbox.insert(tk.END, f"[{priority[0]}] {task_text}")
-            self.task_listbox.itemconfig(tk.END, {'fg': self.theme[f"{priority.upper()}_PRIORITY"]})
+            self.task_listbox.add(task_text, self.priority_var.get())
             self.task_entry.delete(0, tk.END); self.focus_set()
-            self._sort_tasks(); self._save_tasks()
+            self._save_tasks()
 
     def delete_task(self):
-        try:
-            idx = self.task_listbox.curselection()[0]
-            self.task_descriptions.pop(self.task_listbox.get(idx), None)
-            self.task_listbox.delete(idx); self._save_tasks()
-        except IndexError: messagebox.showwarning("No Selection", "Please select a task to delete.")
+        tid = self.task_listbox.selected_id()
+        if tid is None: messagebox.showwarning("No Selection", "Please select a task to delete."); return
+        self.task_listbox.remove(tid); self._save_tasks()
 
     def delete_all_tasks(self):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete all tasks?"):
-            self.task_listbox.delete(0, tk.END); self.task_descriptions.clear(); self._save_tasks()
+            self.task_listbox.clear(); self._save_tasks()
 
     def edit_task_description(self, event):
-        try:
-            idx = self.task_listbox.curselection()[0]; task_text = self.task_listbox.get(idx)
-            dialog = TaskDescriptionDialog(self, task_text, self.task_descriptions.get(task_text, ""), self.theme)
-            self.wait_window(dialog)
-            if dialog.result is not None: 
-                self.task_descriptions[task_text] = dialog.result
-                self._save_tasks()
-        except IndexError: pass
+        tid = self.task_listbox.selected_id()
+        if tid is None: return
+        dialog = TaskDescriptionDialog(self, self.tasks.display(tid), self.tasks[tid]["description"], self.theme)
+        self.wait_window(dialog)
+        if dialog.result is not None and tid in self.tasks.tasks:
+            self.tasks[tid]["description"] = dialog.result
+            self._save_tasks()
 
     # Right-click context menu for changing task priority
     def _show_priority_menu(self, event):
@@ -536,39 +1022,25 @@ class PomodoroTimer(tk.Toplevel):
         finally:
             priority_menu.grab_release()
 
-    # Change the priority of a task and update its color accordingly
+    # Change the priority of a task; only its old and new rows are redrawn
     def change_task_priority(self, task_index, new_priority):
         try:
-            old_task_text = self.task_listbox.get(task_index)
-            task_content = old_task_text[4:]
-            new_task_text = f"[{new_priority[0]}] {task_content}"
-
-            if old_task_text in self.task_descriptions:
-                self.task_descriptions[new_task_text] = self.task_descriptions.pop(old_task_text)
-
-            self.task_listbox.delete(task_index)
-            self.task_listbox.insert(task_index, new_task_text)
-
-            self._sort_tasks()
-            self._save_tasks()
-
-            all_tasks = self.task_listbox.get(0, tk.END)
-            if new_task_text in all_tasks:
-                new_idx = all_tasks.index(new_task_text)
-                self.task_listbox.selection_set(new_idx)
-                self.task_listbox.activate(new_idx)
-                self.task_listbox.see(new_idx)
-
+            tid = self.tasks.id_at(task_index)
         except IndexError:
-            messagebox.showerror("Error", "Could not change task priority.")
+            messagebox.showerror("Error", "Could not change task priority."); return
+        new_idx = self.task_listbox.set_priority(tid, new_priority)
+        self._save_tasks()
+        self.task_listbox.selection_clear(0, tk.END)
+        self.task_listbox.selection_set(new_idx)
+        self.task_listbox.activate(new_idx)
+        self.task_listbox.see(new_idx)
 
     # Settings window to configure timer durations, intervals, and sound file
     def open_settings_window(self):
         dialog = SettingsWindow(self, self.settings, self.theme); self.wait_window(dialog)
         if dialog.result:
-            self.settings.update(dialog.result)
+            self.engine.update_settings(dialog.result)
             self._save_data()
-            self.switch_mode(self.current_mode, force_reset=True)
             messagebox.showinfo("Settings Updated", "Timer settings have been saved.")
 
     # Reset all settings to default values except theme
@@ -577,38 +1049,21 @@ class PomodoroTimer(tk.Toplevel):
             theme = self.settings['theme']
             self.settings = DEFAULT_SETTINGS.copy()
             self.settings['theme'] = theme
-            self.app_data['settings'] = self.settings
+            self.app_data['settings'] = self.engine.settings = self.settings
             self._save_data()
-            self.switch_mode(self.current_mode, force_reset=True)
+            self.engine.reset()
             messagebox.showinfo("Settings Reset", "Settings have been reset to default values.")
 
     # Update timer settings and apply changes
     def update_timer_settings(self, new_durations):
-        self.settings.update(new_durations)
+        self.engine.update_settings(new_durations)
         self._save_data()
-        self.switch_mode(self.current_mode, force_reset=True)
 
     # --- Data Persistence ---
     def _save_tasks(self):
-        tasks = [{'text': self.task_listbox.get(i), 'color': self.task_listbox.itemcget(i, 'fg')} for i in range(self.task_listbox.size())]
-        self.app_data['tasks_data']['tasks'] = tasks
-        self.app_data['tasks_data']['descriptions'] = self.task_descriptions
+        self.app_data['tasks_data'] = self.tasks.to_data()
         self._save_data()
 
-    def _load_tasks_to_listbox(self):
-        for task in self.task_data.get('tasks', []):
-            self.task_listbox.insert(tk.END, task['text'])
-            if "color" in task:
-                self.task_listbox.itemconfig(tk.END, {'fg': task['color']})
-        self._sort_tasks()
-
-    def _recolor_tasks(self):
-        for i in range(self.task_listbox.size()):
-            task_text = self.task_listbox.get(i)
-            priority_char = task_text[1]
-            priority = next((p for p in PRIORITIES if p.startswith(priority_char)), None)
-            if priority: self.task_listbox.itemconfig(i, {'fg': self.theme[f"{priority.upper()}_PRIORITY"]})
-
     def _check_daily_goal(self):
         goal_data = self.app_data.get('daily_goal', {})
         self.daily_goal = goal_data.get("goal", "") if goal_data.get("date") == str(date.today()) else ""
@@ -626,37 +1081,23 @@ class PomodoroTimer(tk.Toplevel):
     def _update_goal_display(self): self.goal_label.config(text=f"Today's Goal: {self.daily_goal}" if self.daily_goal else "Click to set your daily goal!")
 
     def _update_button_states(self):
-        is_stopwatch = self.current_mode == MODES["STOPWATCH"]
-        self.control_buttons["pause"].config(text="Stop" if is_stopwatch else "Pause")
-        self.control_buttons["start"].config(state="disabled" if self.is_running else "normal")
-        self.control_buttons["pause"].config(state="normal" if self.is_running else "disabled")
-        if not is_stopwatch:
-            mode_key = next(k for k, v in MODES.items() if v == self.current_mode).lower()
-            self.control_buttons["start"].config(text="Start" if self.time_left == self.settings.get(f"{mode_key}_duration", 0) else "Resume")
+        engine = self.engine
+        self.control_buttons["pause"].config(text="Stop" if engine.is_stopwatch else "Pause")
+        self.control_buttons["start"].config(state="disabled" if engine.is_running else "normal")
+        self.control_buttons["pause"].config(state="normal" if engine.is_running else "disabled")
+        if not engine.is_stopwatch:
+            self.control_buttons["start"].config(text="Start" if engine.is_fresh else "Resume")
 
     def _update_timer_display(self):
-        display_time = self.stopwatch_time if self.current_mode == MODES["STOPWATCH"] else self.time_left
-        self.timer_label.config(text=self._format_time(display_time))
+        text = self.engine.format()
+        if text != self._shown_time:  # skip the Tk call when the shown time has not changed
+            self._shown_time = text; self.timer_label.config(text=text)
 
     def _update_mode_buttons_display(self):
         for mode, button in self.mode_buttons.items():
-            is_active = mode == self.current_mode
+            is_active = mode == self.engine.mode
             button.config(bg=self.theme["ACCENT"] if is_active else self.theme["BUTTON"], fg=self.theme["FOREGROUND"], relief="sunken" if is_active else "flat")
 
-    def _format_time(self, seconds):
-        if self.current_mode == MODES["STOPWATCH"]:
-            h, rem = divmod(seconds, 3600); m, s = divmod(rem, 60); return f"{h:02d}:{m:02d}:{s:02d}"
-        return f"{seconds // 60:02d}:{seconds % 60:02d}"
-
-    def _sort_tasks(self):
-        tasks = list(self.task_listbox.get(0, tk.END))
-        priority_map = {f"[{p[0]}]": i for i, p in enumerate(PRIORITIES)}
-        tasks.sort(key=lambda item: priority_map.get(item[:3], 99))
-        self.task_listbox.delete(0, tk.END)
-        for text in tasks:
-            self.task_listbox.insert(tk.END, text)
-        self._recolor_tasks()
-
     def _play_sound(self):
         sound_path = self.settings.get("sound_file_path")
         if sound_path and not os.path.isabs(sound_path):
@@ -671,53 +1112,53 @@ class PomodoroTimer(tk.Toplevel):
         else: 
             self.bell()
 
-    def _load_data(self):
-        """
-        Loads data from the main data file, ensuring that the loaded data is
-        merged with defaults to handle forward compatibility if new settings
-        or keys are added in future versions of the application.
-        """
-        user_data = self._load_json(DATA_FILE, {})
-        
-        # Create the final configuration by starting with defaults and then
-        # overriding them with the user's saved data.
-        final_data = DEFAULT_DATA.copy()
-        final_data.update(user_data)
-        
-        # For nested dictionaries like 'settings', we must merge them explicitly
-        # to ensure new default keys are added to the user's configuration.
-        final_data['settings'] = {**DEFAULT_SETTINGS, **final_data.get('settings', {})}
-        
-        return final_data
-
-    # Read and load JSON data from a file
-    def _load_json(self, file_path, default=None):
-        os.makedirs(DATA_DIR, exist_ok=True)
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f: return json.load(f)
-            except (json.JSONDecodeError, IOError): pass
-        return default if default is not None else {}
-
-    def _save_data(self):
-        self._save_json(DATA_FILE, self.app_data)
+    def _save_data(self): self.writer.save(self.app_data)
 
-    def _save_json(self, file_path, data):
-        os.makedirs(DATA_DIR, exist_ok=True)
-        try:
-            with open(file_path, 'w') as f: json.dump(data, f, indent=4)
-        except IOError as e:
-            print(f"Error saving data to {file_path}: {e}")
+    # Also runs when the window goes away without _on_closing (e.g. its master was destroyed)
+    def _on_destroy(self, event):
+        if event.widget is self: self.writer.close(); self.history.close()
 
     def _on_closing(self):
+        self.engine.interrupt()
         self._save_data()
-        self.destroy()
+        self.destroy()  # <Destroy> closes the writers, which writes anything pending
         
         # If running standalone, quit the hidden root
         if isinstance(self.master, tk.Tk) and not self.master.winfo_viewable():
             self.master.quit()
 
-# --- 6. Main Execution Block ---
+# --- 10. Command Line ---
+CLI_MODES = {"pomodoro": MODES["POMODORO"], "short": MODES["SHORT_BREAK"], "long": MODES["LONG_BREAK"], "stopwatch": MODES["STOPWATCH"]}
+
+def run_cli(argv=None):
+    """Runs the timer in the terminal; each session starts by itself after the previous one. Ctrl+C stops."""
+    parser = argparse.ArgumentParser(description="Pomodoro Timer")
+    parser.add_argument("--cli", action="store_true", help="run in the terminal instead of opening a window")
+    parser.add_argument("--mode", choices=CLI_MODES, default="pomodoro", help="mode to start in (default: pomodoro)")
+    parser.add_argument("--sessions", type=int, default=0, metavar="N", help="stop after N Pomodoro sessions (default: run until Ctrl+C)")
+    parser.add_argument("--task", help="task to log the Pomodoros against in the session history")
+    args = parser.parse_args(argv)
+
+    engine = PomodoroEngine(load_app_data()['settings'])
+    history = SessionHistory()
+    engine.on("session", lambda mode, planned, actual, outcome: history.record(mode, planned, actual, outcome, task=args.task))
+    show = lambda *_: print(f"\r{engine.mode:<12} {engine.format()}   Sessions Completed: {engine.sessions_completed}", end="", flush=True)
+    engine.on("tick", show); engine.on("state", show)
+    engine.on("complete", lambda mode, next_mode: print(f"\r{mode} session is complete!\a".ljust(60)))
+    engine.switch_mode(CLI_MODES[args.mode])
+    try:
+        while not (args.sessions and engine.sessions_completed >= args.sessions):
+            engine.start()
+            wait = engine.tick()
+            while wait is not None:
+                time.sleep(wait + TICK_SLACK_MS / 1000); wait = engine.tick()
+    except KeyboardInterrupt:
+        engine.interrupt()
+    history.close()
+    print(f"\nSessions completed: {engine.sessions_completed}")
+    return 0
+
+# --- 11. Main Execution Block ---
 def main(master=None):
     """Creates and runs the Pomodoro Timer application."""
     if master is None:
@@ -730,4 +1171,5 @@ def main(master=None):
         return app # Return the app instance for embedding in other applications
 
 if __name__ == "__main__":
+    if "--cli" in sys.argv[1:]: sys.exit(run_cli())
     main()
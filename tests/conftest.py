@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# the apps are top-level modules in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_dir(tmp_path, monkeypatch):
+    """The apps create data/ relative to the working directory; keep it out of the repository."""
+    monkeypatch.chdir(tmp_path)
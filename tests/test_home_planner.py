@@ -0,0 +1,258 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import home_planner as hp
+
+
+def make_task(i, **fields):
+    task = {"id": f"t{i}", "subject": "Math", "title": f"Task {i}", "deadline": "2025-01-10",
+            "category": "", "priority": "Medium", "status": "Not Done", "notes": ""}
+    task.update(fields)
+    return task
+
+
+def storage(tmp_path, **kw):
+    return hp.JournaledTaskStorage(tmp_path / "homework.json", tmp_path / "homework.journal", **kw)
+
+
+def sqlite_storage(tmp_path):
+    return hp.SQLiteTaskStorage(tmp_path / "homework.db", storage(tmp_path))
+
+
+def load_store(st):
+    store = hp.TaskStore(st)
+    while store.load_more():
+        pass
+    return store
+
+
+# ---------- iter_json_array ----------
+@pytest.mark.parametrize("text", [
+    '[1.5]',
+    '  [ 1.5 , 2e10, -3, true, null, "x,]", {"a": [1, 2]}, [], 12345678901234 ]',
+    '[\n]',
+    '[1,\n2.25\n]',
+])
+@pytest.mark.parametrize("chunk", [1, 2, 3, 5, 8, 64])
+def test_iter_json_array_any_chunk_size(tmp_path, text, chunk):
+    path = tmp_path / "a.json"
+    path.write_text(text, encoding="utf-8")
+    assert list(hp.iter_json_array(path, chunk)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['[1x]', '[1.]', '[1,', '{"a": 1}'])
+def test_iter_json_array_rejects_broken_files(tmp_path, text):
+    path = tmp_path / "a.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(hp.iter_json_array(path, 2))
+
+
+# ---------- journal ----------
+def test_journal_replays_puts_and_deletes(tmp_path):
+    st = storage(tmp_path)
+    st.save([make_task(i) for i in range(3)])
+    st.put(make_task(1, title="edited"))
+    st.delete("t2")
+    st.put(make_task(3))
+    tasks = storage(tmp_path).load()
+    assert [t["id"] for t in tasks] == ["t0", "t1", "t3"]
+    assert tasks[1]["title"] == "edited"
+
+
+def test_journal_ignores_a_torn_last_line(tmp_path):
+    st = storage(tmp_path)
+    st.save([make_task(0)])
+    st.put(make_task(0, title="kept"))
+    with open(st.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "task": {"id": "t0", "ti')
+    assert storage(tmp_path).load()[0]["title"] == "kept"
+
+
+def test_backfilled_ids_keep_later_edits_across_relaunches(tmp_path):
+    legacy = [{"subject": "Math", "title": f"Old {i}", "deadline": "2025-01-10"} for i in range(5)]
+    (tmp_path / "homework.json").write_text(json.dumps(legacy), encoding="utf-8")
+    tasks = storage(tmp_path).load()
+    ids = [t["id"] for t in tasks]
+    st = storage(tmp_path)
+    st.put(dict(tasks[0], title="edited"))
+    st.delete(ids[1])
+    for _ in range(3):
+        tasks = storage(tmp_path).load()
+    assert [t["id"] for t in tasks] == [ids[0]] + ids[2:]
+    assert tasks[0]["title"] == "edited"
+    # the backfill is journaled once, not on every load
+    with open(st.journal_file, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == len(legacy) + 2
+
+
+def test_loading_a_legacy_file_compacts_the_ids_into_the_snapshot(tmp_path):
+    legacy = [{"subject": "Math", "title": f"Old {i}"} for i in range(5)]
+    (tmp_path / "homework.json").write_text(json.dumps(legacy), encoding="utf-8")
+    store = load_store(storage(tmp_path))
+    store.close()
+    snapshot = json.loads((tmp_path / "homework.json").read_text(encoding="utf-8"))
+    assert [t["id"] for t in snapshot] == [t["id"] for t in store.tasks]
+
+
+def test_compaction_keeps_every_task(tmp_path):
+    st = storage(tmp_path, compact_bytes=1)
+    st.save([make_task(i) for i in range(10)])
+    st.put(make_task(3, title="edited"))
+    st.compact([make_task(i, title="edited" if i == 3 else f"Task {i}") for i in range(10)], background=False)
+    assert not st.journal_file.exists() and not st.rotated_file.exists()
+    st.delete("t0")
+    tasks = storage(tmp_path).load()
+    assert len(tasks) == 9 and tasks[2]["title"] == "edited"
+
+
+def test_edits_during_load_do_not_compact_a_partial_list(tmp_path):
+    st = storage(tmp_path, compact_bytes=1)
+    st.save([make_task(i) for i in range(hp.FIRST_SCREEN_ROWS * 3)])
+    store = hp.TaskStore(st)
+    store.load_more(0)
+    assert len(store.tasks) == hp.FIRST_SCREEN_ROWS
+    store.update("t0", {"title": "edited"})
+    store.writer.flush()
+    st.wait_for_compaction()
+    while store.load_more():
+        pass
+    store.close()
+    tasks = storage(tmp_path).load()
+    assert len(tasks) == hp.FIRST_SCREEN_ROWS * 3
+    assert tasks[0]["title"] == "edited"
+
+
+# ---------- SQLite ----------
+def test_sqlite_migrates_a_legacy_file_without_writing_to_it(tmp_path):
+    legacy = [{"subject": "Math", "title": f"Old {i}", "deadline": "2025-01-10"} for i in range(5)]
+    (tmp_path / "homework.json").write_text(json.dumps(legacy), encoding="utf-8")
+    tasks = sqlite_storage(tmp_path).load()
+    assert [t["title"] for t in tasks] == [t["title"] for t in legacy]
+    assert not (tmp_path / "homework.journal").exists()
+    assert json.loads((tmp_path / "homework.json").read_text(encoding="utf-8")) == legacy
+
+
+def test_sqlite_queries_use_the_indexes(tmp_path):
+    st = sqlite_storage(tmp_path)
+    plans = {
+        "idx_tasks_status": ("SELECT id FROM tasks WHERE status=? ORDER BY rowid", ("Done",)),
+        "idx_tasks_deadline": ("SELECT id FROM tasks WHERE deadline BETWEEN ? AND ? ORDER BY deadline, rowid",
+                               ("2025-01-01", "2025-01-31")),
+    }
+    for name, (sql, params) in plans.items():
+        plan = " ".join(r[-1] for r in st._connect().execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert name in plan
+
+
+@pytest.mark.parametrize("backend", [storage, sqlite_storage])
+def test_store_status_and_deadline_queries(tmp_path, backend):
+    st = backend(tmp_path)
+    st.save([make_task(0, deadline="2025-01-31"), make_task(1, deadline="2025-01-01", status="Done"),
+             make_task(2, deadline="2025-02-01"), make_task(3, deadline="2025-01-15")])
+    store = load_store(st)
+    store.update("t0", {"status": "Done"})  # still in the writer's queue
+    assert [t["id"] for t in store.tasks_with_status("Done")] == ["t0", "t1"]
+    jan = store.tasks_due_between(date(2025, 1, 1), date(2025, 1, 31))
+    assert [t["id"] for t in jan] == ["t1", "t3", "t0"]
+    assert all(t is store.get(t["id"]) for t in jan)
+    store.close()
+
+
+def test_sqlite_status_list_covers_tasks_not_loaded_yet(tmp_path):
+    st = sqlite_storage(tmp_path)
+    st.save([make_task(i, status="Done" if i % 2 else "Not Done") for i in range(hp.FIRST_SCREEN_ROWS * 3)])
+    store = hp.TaskStore(st)
+    store.load_more(0)
+    assert len(store.tasks) < hp.FIRST_SCREEN_ROWS * 3
+    assert len(store.tasks_with_status("Done")) == hp.FIRST_SCREEN_ROWS * 3 // 2
+    store.close()
+
+
+# ---------- index and queries ----------
+def test_task_index_orders_and_flags_overdue():
+    today = date.today()
+    tasks = [
+        make_task(0, deadline=str(today + timedelta(days=3)), priority="Low"),
+        make_task(1, deadline=str(today - timedelta(days=1))),
+        make_task(2, deadline=str(today + timedelta(days=3)), priority="High"),
+        make_task(3, deadline=str(today - timedelta(days=5)), status="Done"),
+        make_task(4, deadline=""),
+    ]
+    index = hp.TaskIndex()
+    index.rebuild(tasks)
+    assert sorted(index.by_id, key=index.sort_keys.get) == ["t1", "t2", "t0", "t4", "t3"]
+    assert index.overdue == {"t1"}
+    index.update(dict(tasks[1], status="Done"))
+    assert index.overdue == set()
+    assert index.open_count_between(today, today + timedelta(days=6)) == 2
+
+
+def test_task_index_rollover_flags_newly_overdue_tasks():
+    today = date.today()
+    index = hp.TaskIndex()
+    index.rebuild([make_task(0, deadline=str(today - timedelta(days=1))), make_task(1, deadline=str(today))])
+    index.today -= timedelta(days=1)  # as if the index was built yesterday
+    index.overdue = set()
+    version = index.version
+    assert index.check_rollover()
+    assert index.overdue == {"t0"}
+    assert index.version > version
+    assert hp.TaskQuery("overdue").ids(index) == {"t0"}
+    assert not index.check_rollover()
+
+
+def test_task_query_combines_facets_free_text_and_due():
+    tasks = [
+        make_task(0, subject="Math", title="Algebra worksheet", deadline="2025-03-01"),
+        make_task(1, subject="Math", title="Geometry proof", deadline="2025-03-20"),
+        make_task(2, subject="History", title="Essay on algebra", deadline="2025-03-01"),
+    ]
+    index = hp.TaskIndex()
+    index.rebuild(tasks)
+    assert hp.TaskQuery("subject:math").ids(index) == {"t0", "t1"}
+    assert hp.TaskQuery("algeb").ids(index) == {"t0", "t2"}
+    assert hp.TaskQuery("subject:math algeb").ids(index) == {"t0"}
+    assert hp.TaskQuery("due:<2025-03-10").ids(index) == {"t0", "t2"}
+
+
+def test_task_history_undo_and_redo(tmp_path):
+    st = storage(tmp_path)
+    st.save([make_task(i) for i in range(3)])
+    store = load_store(st)
+    history = hp.TaskHistory(store)
+    history.add(make_task(3))
+    history.update_many({"t0": {"title": "edited"}})
+    history.remove_many(["t1"])
+    assert history.undo() and history.undo()
+    assert store.get("t1") is not None and store.get("t0")["title"] == "Task 0"
+    assert history.redo()
+    assert store.get("t0")["title"] == "edited"
+    assert history.undo() and history.undo()
+    assert store.get("t3") is None
+    store.close()
+    assert sorted(t["id"] for t in storage(tmp_path).load()) == ["t0", "t1", "t2"]
+
+
+def test_study_schedule_packs_by_deadline_and_flags_late_tasks(tmp_path):
+    today = date.today()
+    st = storage(tmp_path)
+    st.save([
+        make_task(0, deadline=str(today + timedelta(days=5)), estimate_hours=4),
+        make_task(1, deadline=str(today + timedelta(days=1)), estimate_hours=1),
+        make_task(2, deadline=str(today), estimate_hours=5),
+    ])
+    store = load_store(st)
+    schedule = hp.StudySchedule(store, hours_per_day=3)
+    schedule.refresh()
+    # t2 (due today) first, then t1, then t0
+    assert schedule.blocks_on(today) == [(store.get("t2"), 3)]
+    assert schedule.hours_on(today + timedelta(days=1)) == 3
+    assert schedule.infeasible == {"t2"}
+    store.update("t2", {"status": "Done"})
+    schedule.refresh()
+    assert schedule.blocks_on(today) == [(store.get("t1"), 1), (store.get("t0"), 2)]
+    assert schedule.infeasible == set()
+    store.close()
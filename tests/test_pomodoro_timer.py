@@ -0,0 +1,160 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import pomodoro_timer as pt
+
+POMODORO, SHORT, LONG, STOPWATCH = (pt.MODES[k] for k in ("POMODORO", "SHORT_BREAK", "LONG_BREAK", "STOPWATCH"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def timer(clock):
+    """An engine on the fake clock, with the sessions and completions it reports."""
+    engine = pt.PomodoroEngine(dict(pt.DEFAULT_SETTINGS, long_break_interval=2), clock=clock)
+    sessions, completed = [], []
+    engine.on("session", lambda *args: sessions.append(args))
+    engine.on("complete", lambda mode, next_mode: completed.append((mode, next_mode)))
+    return engine, sessions, completed
+
+
+def run_until_idle(engine, clock, late=0.0):
+    """Drive tick() the way the window does, each call arriving `late` seconds after it was due."""
+    while True:
+        wait = engine.tick()
+        if wait is None:
+            return
+        clock.now += wait + late
+
+
+# ---------- engine ----------
+def test_countdown_ends_on_time_even_with_late_ticks(timer, clock):
+    engine, sessions, completed = timer
+    engine.start()
+    start = clock.now
+    run_until_idle(engine, clock, late=0.7)
+    assert clock.now - start == pytest.approx(25 * 60, abs=1)
+    assert completed == [(POMODORO, SHORT)]
+    assert sessions == [(POMODORO, 1500, 1500, "completed")]
+    assert engine.mode == SHORT and engine.sessions_completed == 1
+
+
+def test_long_break_after_the_interval(timer, clock):
+    engine, sessions, completed = timer
+    for _ in range(2):
+        engine.switch_mode(POMODORO)
+        engine.start()
+        run_until_idle(engine, clock)
+    assert [nxt for _, nxt in completed] == [SHORT, LONG]
+
+
+def test_pause_keeps_the_exact_time_left(timer, clock):
+    engine, sessions, completed = timer
+    engine.start()
+    clock.now += 100.4
+    engine.pause()
+    clock.now += 500  # paused time does not count
+    assert engine.remaining == pytest.approx(1399.6)
+    assert not engine.is_fresh
+    engine.start()
+    clock.now += 1399.5
+    engine.tick()
+    assert engine.is_running and engine.format() == "00:01"
+
+
+def test_reset_and_interrupt_end_the_session(timer, clock):
+    engine, sessions, completed = timer
+    engine.start()
+    clock.now += 60
+    engine.reset()
+    assert sessions == [(POMODORO, 1500, 60, "skipped")]
+    assert engine.is_fresh and not engine.session_active
+    engine.start()
+    clock.now += 30
+    engine.interrupt()
+    engine.interrupt()  # only once per session
+    assert sessions[1:] == [(POMODORO, 1500, 30, "interrupted")]
+
+
+def test_stopwatch_is_not_a_session(timer, clock):
+    engine, sessions, completed = timer
+    engine.switch_mode(STOPWATCH)
+    engine.start()
+    clock.now += 3725.5
+    engine.tick()
+    assert engine.format() == "01:02:05"
+    engine.reset()
+    assert sessions == []
+
+
+# ---------- session history ----------
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "history.jsonl"), str(tmp_path / "stats.json")
+
+
+def record_days(history, days, outcome="completed"):
+    for d in days:
+        history.record(POMODORO, 1500, 1500, outcome, task="Essay", when=datetime.combine(d, datetime.min.time()))
+
+
+def test_history_rollups_and_streak(paths):
+    today = date(2025, 3, 12)
+    history = pt.SessionHistory(*paths)
+    record_days(history, [today - timedelta(days=5), today - timedelta(days=1), today])
+    record_days(history, [today], outcome="skipped")
+    history.record(SHORT, 300, 300, "completed", when=datetime.combine(today, datetime.min.time()))
+    assert history.day(today) == {"sessions": 1, "focus": 3000, "skipped": 1}
+    assert history.totals()["sessions"] == 3
+    assert history.streak(today) == (2, 2)
+    assert history.streak(today + timedelta(days=2)) == (0, 2)
+    assert history.top_tasks() == [("Essay", {"sessions": 3, "focus": 6000, "skipped": 1})]
+    history.close()
+
+
+def test_history_catches_up_from_a_stale_stats_file(paths):
+    history_path, stats_path = paths
+    history = pt.SessionHistory(*paths)
+    record_days(history, [date(2025, 3, 10)])
+    history.close()
+    stale = json.load(open(stats_path))
+    history = pt.SessionHistory(*paths)
+    record_days(history, [date(2025, 3, 11)])
+    history.close()
+    expected = history.stats
+    # the app crashed before the second stats write, and mid-way through a third line
+    json.dump(stale, open(stats_path, "w"))
+    with open(history_path, "a") as f:
+        f.write('{"end": "2025-03-1')
+    history = pt.SessionHistory(*paths)
+    assert history.stats == expected
+    record_days(history, [date(2025, 3, 12)])
+    history.close()
+    assert pt.SessionHistory(*paths).totals()["sessions"] == 3
+
+
+# ---------- task list ----------
+def test_task_list_keeps_priority_order_and_converts_old_files():
+    tasks = pt.TaskList({"tasks": [{"text": "[L] a"}, {"text": "[H] b"}, {"text": "[L] a"}],
+                         "descriptions": {"[H] b": "notes"}})
+    assert [tasks.display(tasks.id_at(i)) for i in range(len(tasks))] == ["[H] b", "[L] a", "[L] a"]
+    assert tasks[tasks.id_at(0)]["description"] == "notes"
+    tid, index = tasks.add("c", "Medium")
+    assert index == 1
+    assert tasks.set_priority(tid, "Low") == (1, 3)
+    assert tasks.remove(tasks.id_at(0)) == 0
+    reloaded = pt.TaskList(tasks.to_data())
+    assert reloaded.keys == tasks.keys and reloaded.next_id == tasks.next_id